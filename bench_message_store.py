@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: per-message connect/insert/commit vs the batched MessageWriter.
+
+Usage: python3 bench_message_store.py [message_count]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def per_message_path(db_file, rows):
+    """The original store_message path: one connection and one commit per message."""
+    for row in rows:
+        conn = sqlite3.connect(db_file)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO messages (chat_id, user_id, message, timestamp) VALUES (?, ?, ?, ?)",
+            row
+        )
+        conn.commit()
+        conn.close()
+
+
+def create_legacy_table(db_file):
+    """Create the original unpartitioned, unindexed messages table."""
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER, "
+        "user_id INTEGER, message TEXT, timestamp INTEGER)"
+    )
+    conn.close()
+
+
+def writer_path(message_store, db_file, rows):
+    """The write-behind path; returns the time the callers spent enqueueing."""
+    writer = message_store.MessageWriter(db_file)
+    start = time.perf_counter()
+    for row in rows:
+        writer.enqueue(*row)
+    enqueue_time = time.perf_counter() - start
+    writer.close()
+    return enqueue_time
+
+
+def count_rows(db_file, tables):
+    """Return how many messages ended up on disk."""
+    conn = sqlite3.connect(db_file)
+    count = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables)
+    conn.close()
+    return count
+
+
+def main():
+    """Run both paths against fresh databases and print the comparison."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rows = [(-100 - i % 5, i % 50, f"benchmark message number {i}", int(time.time())) for i in range(count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # message_store initialises messages.db in the working directory on import
+        os.chdir(tmp)
+        sys.path.insert(0, os.path.join(ROOT, "src"))
+        import message_store  # pylint: disable=import-outside-toplevel
+
+        legacy_db = os.path.join(tmp, "legacy.db")
+        batched_db = os.path.join(tmp, "batched.db")
+        create_legacy_table(legacy_db)
+        message_store.init_db(batched_db)
+
+        start = time.perf_counter()
+        per_message_path(legacy_db, rows)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        enqueue_time = writer_path(message_store, batched_db, rows)
+        batched_time = time.perf_counter() - start
+
+        conn = message_store.connect(batched_db)
+        buckets = message_store.list_buckets(conn)
+        conn.close()
+
+        print(f"Messages:             {count}")
+        print(f"Per-message commit:   {legacy_time:.3f}s  ({count / legacy_time:,.0f} msg/s)")
+        print(f"Batched WAL writer:   {batched_time:.3f}s  ({count / batched_time:,.0f} msg/s)")
+        print(f"  caller enqueue cost {enqueue_time * 1e6 / count:.1f} µs/msg")
+        print(f"Speed-up:             {legacy_time / batched_time:.1f}x")
+        print(f"Rows on disk:         legacy={count_rows(legacy_db, ['messages'])} "
+              f"batched={count_rows(batched_db, [f'messages_{b}' for b in buckets])}")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
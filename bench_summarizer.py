@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark summarizer inference modes on a fixed local corpus of chat messages.
+
+Each configuration (checkpoint + precision) runs in a fresh process, so load time
+and memory are measured from a clean start. For every configuration the script
+reports model load time, resident memory after load, mean latency per window
+and ROUGE-1/2/L F1 drift against the first configuration (the fp32 baseline).
+
+Usage:
+    python3 bench_summarizer.py [model:precision ...]
+    e.g. python3 bench_summarizer.py facebook/bart-large-cnn:fp32 facebook/bart-large-cnn:int8
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(ROOT, "bench_data", "chat_corpus.txt")
+DEFAULT_CONFIGS = [
+    "facebook/bart-large-cnn:fp32",
+    "facebook/bart-large-cnn:int8",
+    "sshleifer/distilbart-cnn-12-6:fp32",
+    "sshleifer/distilbart-cnn-12-6:int8",
+]
+
+
+def load_corpus():
+    """Return the corpus as a list of windows, each a list of messages."""
+    windows, current = [], []
+    with open(CORPUS, encoding="utf-8") as corpus:
+        for line in corpus:
+            line = line.strip()
+            if line.startswith("#") or not line:
+                continue
+            if line == "---":
+                windows.append(current)
+                current = []
+            else:
+                current.append(line)
+    if current:
+        windows.append(current)
+    return windows
+
+
+def run_config(model_name, precision):
+    """Child process: load one configuration, summarize every window, print JSON results."""
+    sys.path.insert(0, os.path.join(ROOT, "src"))
+    import summary_model  # pylint: disable=import-outside-toplevel
+
+    windows = load_corpus()
+    started = time.perf_counter()
+    pipe = summary_model._load_pipeline(model_name, precision)  # pylint: disable=protected-access
+    load_seconds = time.perf_counter() - started
+    memory_mb = summary_model.resident_memory_mb()
+
+    summary_model.summarize_hierarchical(pipe, windows[0])  # warm-up, not timed
+    latencies, summaries = [], []
+    for window in windows:
+        started = time.perf_counter()
+        summaries.append(summary_model.summarize_hierarchical(pipe, window))
+        latencies.append(time.perf_counter() - started)
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "memory_mb": memory_mb,
+        "latencies": latencies,
+        "summaries": summaries,
+    }))
+
+
+def _ngrams(tokens, n):
+    counts = {}
+    for i in range(len(tokens) - n + 1):
+        gram = tuple(tokens[i:i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    """ROUGE-N F1 over lower-cased whitespace tokens."""
+    cand, ref = _ngrams(candidate.lower().split(), n), _ngrams(reference.lower().split(), n)
+    overlap = sum(min(count, ref.get(gram, 0)) for gram, count in cand.items())
+    return _f1(overlap, sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    """ROUGE-L F1 (longest common subsequence) over lower-cased whitespace tokens."""
+    cand, ref = candidate.lower().split(), reference.lower().split()
+    previous = [0] * (len(ref) + 1)
+    for token in cand:
+        current = [0]
+        for j, ref_token in enumerate(ref):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(cand), len(ref))
+
+
+def main():
+    """Run every configuration in its own process and print the comparison table."""
+    configs = sys.argv[1:] or DEFAULT_CONFIGS
+    results = {}
+    for config in configs:
+        model_name, precision = config.rsplit(":", 1)
+        print(f"Running {config}...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, __file__, "--run", model_name, precision],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[config] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = results[configs[0]]["summaries"]
+    print(f"{'configuration':40} {'load s':>7} {'RSS MB':>7} {'latency s':>10} {'R-1':>6} {'R-2':>6} {'R-L':>6}")
+    for config in configs:
+        result = results[config]
+        pairs = list(zip(result["summaries"], baseline))
+        r1 = sum(rouge_n(c, r, 1) for c, r in pairs) / len(pairs)
+        r2 = sum(rouge_n(c, r, 2) for c, r in pairs) / len(pairs)
+        rl = sum(rouge_l(c, r) for c, r in pairs) / len(pairs)
+        latency = sum(result["latencies"]) / len(result["latencies"])
+        print(f"{config:40} {result['load_seconds']:7.1f} {result['memory_mb']:7.0f} {latency:10.2f} "
+              f"{r1:6.3f} {r2:6.3f} {rl:6.3f}")
+    print(f"\nROUGE F1 is measured against {configs[0]}; 1.000 means identical summaries.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_config(sys.argv[2], sys.argv[3])
+    else:
+        main()
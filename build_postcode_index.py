@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Build the memory-mapped UK outward-postcode index used by /weather.
+
+Reads a CSV with a postcode (or outward code) column and latitude/longitude
+columns, averages the coordinates of every postcode per outward code and writes
+src/data/uk_outcodes.bin. Accepts the bundled outward-code table (src/data/uk_outcodes.csv)
+as well as the ONS Postcode Directory (ONSPD, Open Government Licence), whose
+pcds/lat/long columns cover every UK postcode; terminated postcodes and those
+without a grid reference are skipped.
+
+Usage:
+    python3 build_postcode_index.py [source.csv] [output.bin]
+"""
+
+import csv
+import os
+import sys
+from src.postcode_index import outward_code, write_index
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.join(ROOT, "src", "data", "uk_outcodes.csv")
+DEFAULT_OUTPUT = os.path.join(ROOT, "src", "data", "uk_outcodes.bin")
+CODE_COLUMNS = ("outcode", "pcds", "pcd", "postcode")
+LATITUDE_COLUMNS = ("latitude", "lat")
+LONGITUDE_COLUMNS = ("longitude", "long", "lon")
+NO_GRID_REFERENCE = 99.999999  # ONSPD latitude of postcodes without a location
+
+
+def pick(header, candidates, source):
+    """Return the first of the candidate column names present in the header."""
+    for name in candidates:
+        if name in header:
+            return name
+    sys.exit(f"{source}: none of the columns {', '.join(candidates)} found")
+
+
+def read_centroids(source):
+    """Return {outward code: (latitude, longitude)} averaged over the source's rows."""
+    sums = {}
+    with open(source, newline="", encoding="utf-8-sig") as data:
+        rows = csv.DictReader(line for line in data if not line.startswith("#"))
+        header = [name.lower() for name in rows.fieldnames or []]
+        rows.fieldnames = header
+        code_column = pick(header, CODE_COLUMNS, source)
+        latitude_column = pick(header, LATITUDE_COLUMNS, source)
+        longitude_column = pick(header, LONGITUDE_COLUMNS, source)
+        for row in rows:
+            if row.get("doterm"):
+                continue
+            code = outward_code(row[code_column] or "")
+            try:
+                latitude, longitude = float(row[latitude_column]), float(row[longitude_column])
+            except (TypeError, ValueError):
+                continue
+            if code is None or latitude == NO_GRID_REFERENCE:
+                continue
+            total = sums.setdefault(code, [0.0, 0.0, 0])
+            total[0] += latitude
+            total[1] += longitude
+            total[2] += 1
+    return {code: (lat / count, lon / count) for code, (lat, lon, count) in sums.items()}
+
+
+def main():
+    """Build the index from the CSV given on the command line (the bundled table by default)."""
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCE
+    output = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_OUTPUT
+    centroids = read_centroids(source)
+    if not centroids:
+        sys.exit(f"{source}: no postcodes with coordinates found")
+    write_index(output, centroids)
+    print(f"Wrote {len(centroids)} outward codes to {output} ({os.path.getsize(output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,37 +6,67 @@ from datetime import time
 import asyncio
 import os
 import sys
-import nest_asyncio
-from telegram.ext import Application, MessageHandler, CommandHandler, filters, CallbackQueryHandler
-from weather import register_weather_handler
-from random_insult import register_insult_handler
-from imdb import register_imdb_handler
-from convert import register_brl_handler
-from dadjokes import register_dadjokes_handler
-from handlers import handle_message, summary_command, handle_summary_selection
-from message_store import purge_old_messages
-from summarizer import daily_group_summary
-from brlusdgraph import register_brlusdgraph_handler
-from btcusdgraph import register_btcusdgraph_handler
-from currencyconverter import register_converter_handler
-from currencyconverter import register_currency_handler
 
-# Debugging
-print("Python executable:", sys.executable)
 
-# Load bot token from environment variables
-TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-if not TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN environment variable is not set!")
+async def shutdown(application):
+    """Flush pending message writes, stop the summarization workers and close pooled HTTP connections."""
+    # pylint: disable=import-outside-toplevel
+    from message_store import close_message_store
+    from summary_worker import summary_service
+    from http_client import close_http_client
+    await close_message_store(application)
+    summary_service.close()
+    await close_http_client(application)
 
 async def main():
     """Main function to run the Telegram bot."""
-    app = Application.builder().token(TOKEN).build()
+    # The bot's modules are imported here rather than at module level: summarization workers are spawned
+    # processes that re-import this file as __mp_main__, and must not load telegram or open the database.
+    # pylint: disable=import-outside-toplevel
+    from telegram.ext import Application, MessageHandler, CommandHandler, filters, CallbackQueryHandler
+    from weather import register_weather_handler
+    from random_insult import register_insult_handler
+    from imdb import register_imdb_handler
+    from convert import register_brl_handler
+    from dadjokes import register_dadjokes_handler
+    from handlers import handle_message, summary_command, handle_summary_selection, SUMMARY_OPTIONS
+    from db import init_schemas
+    from message_store import init_db, purge_old_messages
+    from summarizer import daily_group_summary, hourly_partial_summaries, seconds_until_next_partial
+    from summary_model import resident_memory_mb
+    from summary_worker import summary_service, WARMUP_ON_START, IDLE_UNLOAD_SECONDS
+    from brlusdgraph import register_brlusdgraph_handler
+    from btcusdgraph import register_btcusdgraph_handler
+    from currencyconverter import register_converter_handler
+    from currencyconverter import register_currency_handler
+    from search import register_search_handler
+    from triggers import register_trigger_handler
+    from netstats import register_netstats_handler
+    from weather_station import station_poller, POLL_SECONDS as STATION_POLL_SECONDS
+    from forecast import prefetch_forecasts, seconds_until_next_update, PREFETCH_CELLS, FORECAST_INTERVAL
+
+    # Debugging
+    print("Python executable:", sys.executable)
+
+    # Load bot token from environment variables
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise ValueError("TELEGRAM_BOT_TOKEN environment variable is not set!")
+
+    # Create the message tables and every imported feature's tables
+    init_db()
+    print("[DB] Initialized database and ensured messages table exists.")
+    init_schemas()
+
+    # Handle updates concurrently, so a slow summary or upstream call never holds up the other chats
+    app = Application.builder().token(token).concurrent_updates(True).post_shutdown(shutdown).build()
 
     # ✅ Register handlers
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_handler(CommandHandler("summary", summary_command))
-    app.add_handler(CallbackQueryHandler(handle_summary_selection))  # ✅ Ensure button clicks are handled
+    app.add_handler(CallbackQueryHandler(  # ✅ Only the summary buttons, so other callbacks reach their handlers
+        handle_summary_selection, pattern=f"^({'|'.join(SUMMARY_OPTIONS)})$"
+    ))
   
 
     # ✅ Start job queue (ensure it is running)
@@ -48,6 +78,15 @@ async def main():
 
     job_queue.run_repeating(purge_old_messages, interval=3600, first=3600) # Every hour
     job_queue.run_daily(daily_group_summary, time=time(0, 0)) # Run at midnight
+    job_queue.run_repeating(hourly_partial_summaries, interval=3600, first=seconds_until_next_partial())
+    if PREFETCH_CELLS:
+        job_queue.run_repeating(prefetch_forecasts, interval=FORECAST_INTERVAL, first=seconds_until_next_update())
+    if STATION_POLL_SECONDS:
+        job_queue.run_repeating(station_poller.poll, interval=STATION_POLL_SECONDS, first=1)
+    if WARMUP_ON_START:
+        job_queue.run_once(summary_service.warm_up, when=5)  # Load the model once polling is up
+    if IDLE_UNLOAD_SECONDS:
+        job_queue.run_repeating(summary_service.unload_if_idle, interval=60, first=60)
 
     # Register command handlers
     register_weather_handler(app)
@@ -59,12 +98,16 @@ async def main():
     register_btcusdgraph_handler(app)
     register_converter_handler(app)
     register_currency_handler(app)
+    register_search_handler(app)
+    register_trigger_handler(app)
+    register_netstats_handler(app)
     
-    print("\n### Bot started! ###\n")
+    print(f"\n### Bot started! (resident memory {resident_memory_mb():.0f} MB) ###\n")
 
     # Start bot
     await app.run_polling()
 
 if __name__ == "__main__":
+    import nest_asyncio
     nest_asyncio.apply()
     asyncio.run(main())
@@ -1,4 +1,3 @@
-import requests
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime, timedelta
@@ -6,10 +5,15 @@ import io
 import base64
 from telegram import Update
 from telegram.ext import CommandHandler, Application
+from http_client import get
+from latency_budget import with_latency_budget
+from singleflight import upstream_flights
 
+# Fetching a month of prices and rendering the chart gets longer than the default command budget
+GRAPH_BUDGET_SECONDS = 15
 
 
-def get_brl_usd_data(days=30):
+async def get_brl_usd_data(days=30):
     """
     Fetch BRL/USD exchange rate data for the specified number of days.
     
@@ -31,10 +35,10 @@ def get_brl_usd_data(days=30):
     url = f"https://api.exchangerate.host/timeseries?start_date={start_str}&end_date={end_str}&base=USD&symbols=BRL"
     
     try:
-        response = requests.get(url)
+        response = await get(url)
         data = response.json()
         
-        if not response.ok or 'rates' not in data:
+        if not response.is_success or 'rates' not in data:
             return None
             
         # Process the data
@@ -58,7 +62,7 @@ def get_brl_usd_data(days=30):
         print(f"Error fetching exchange rate data: {e}")
         return None
 
-def create_brl_usd_graph(days=30, chart_title="BRL/USD Exchange Rate"):
+async def create_brl_usd_graph(days=30, chart_title="BRL/USD Exchange Rate"):
     """
     Create a graph of the BRL/USD exchange rate.
     
@@ -70,7 +74,7 @@ def create_brl_usd_graph(days=30, chart_title="BRL/USD Exchange Rate"):
         str: Base64 encoded image that can be sent by the bot
         dict: Summary statistics of the exchange rate
     """
-    df = get_brl_usd_data(days)
+    df = await get_brl_usd_data(days)
     
     if df is None or len(df) < 2:
         return None, {"error": "Could not retrieve exchange rate data"}
@@ -114,7 +118,8 @@ def create_brl_usd_graph(days=30, chart_title="BRL/USD Exchange Rate"):
     return img_str, stats
 
 # Example of integration with a bot framework (e.g., python-telegram-bot)
-def handle_exchange_rate_command(update, context):
+@with_latency_budget(GRAPH_BUDGET_SECONDS)
+async def handle_exchange_rate_command(update, context):
     """
     Handler for the /brl_usd command in a Telegram bot.
     
@@ -130,19 +135,20 @@ def handle_exchange_rate_command(update, context):
         days = min(int(context.args[0]), 365)  # Limit to 1 year max
     
     # Send a "processing" message
-    message = update.message.reply_text("Generating BRL/USD exchange rate graph...")
+    message = await update.message.reply_text("Generating BRL/USD exchange rate graph...")
     
     # Generate the graph
-    img_str, stats = create_brl_usd_graph(days)
+    # Everyone asking for the same graph at once shares one fetch and render
+    img_str, stats = await upstream_flights.do("brl_usd_graph", days, lambda: create_brl_usd_graph(days))
     
     if img_str is None:
-        update.message.reply_text("Sorry, I couldn't retrieve the exchange rate data. Please try again later.")
+        await update.message.reply_text("Sorry, I couldn't retrieve the exchange rate data. Please try again later.")
         return
     
     # Send the graph
-    context.bot.send_photo(
+    await context.bot.send_photo(
         chat_id=update.effective_chat.id,
-        photo=img_str,
+        photo=base64.b64decode(img_str),
         caption=f"BRL/USD Exchange Rate for the last {days} days\n\n"
                f"Current rate: R$ {stats['current_rate']:.2f}\n"
                f"Average: R$ {stats['avg_rate']:.2f}\n"
@@ -152,7 +158,7 @@ def handle_exchange_rate_command(update, context):
     )
     
     # Delete the "processing" message
-    message.delete()
+    await message.delete()
 
 def register_brlusdgraph_handler(app):
       
@@ -1,4 +1,3 @@
-import requests
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime, timedelta
@@ -6,8 +5,14 @@ import io
 import base64
 from telegram import Update
 from telegram.ext import CommandHandler, Application
+from http_client import get
+from latency_budget import with_latency_budget
+from singleflight import upstream_flights
 
-def get_btc_usd_data(days=30):
+# Fetching a month of prices and rendering the chart gets longer than the default command budget
+GRAPH_BUDGET_SECONDS = 15
+
+async def get_btc_usd_data(days=30):
     """
     Fetch BTC/USD exchange rate data for the specified number of days.
     
@@ -29,10 +34,10 @@ def get_btc_usd_data(days=30):
     url = f"https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range?vs_currency=usd&from={start_timestamp}&to={end_timestamp}"
     
     try:
-        response = requests.get(url)
+        response = await get(url)
         data = response.json()
         
-        if not response.ok or 'prices' not in data:
+        if not response.is_success or 'prices' not in data:
             return None
             
         # Process the data - CoinGecko returns [timestamp, price] pairs
@@ -52,7 +57,7 @@ def get_btc_usd_data(days=30):
         print(f"Error fetching Bitcoin price data: {e}")
         return None
 
-def create_btc_usd_graph(days=30, chart_title="BTC/USD Exchange Rate"):
+async def create_btc_usd_graph(days=30, chart_title="BTC/USD Exchange Rate"):
     """
     Create a graph of the BTC/USD exchange rate.
     
@@ -64,7 +69,7 @@ def create_btc_usd_graph(days=30, chart_title="BTC/USD Exchange Rate"):
         str: Base64 encoded image that can be sent by the bot
         dict: Summary statistics of the exchange rate
     """
-    df = get_btc_usd_data(days)
+    df = await get_btc_usd_data(days)
     
     if df is None or len(df) < 2:
         return None, {"error": "Could not retrieve Bitcoin price data"}
@@ -116,7 +121,8 @@ def create_btc_usd_graph(days=30, chart_title="BTC/USD Exchange Rate"):
     return img_str, stats
 
 # Example of integration with a bot framework (e.g., python-telegram-bot)
-def handle_btc_price_command(update, context):
+@with_latency_budget(GRAPH_BUDGET_SECONDS)
+async def handle_btc_price_command(update, context):
     """
     Handler for the /btc_usd command in a Telegram bot.
     
@@ -132,22 +138,23 @@ def handle_btc_price_command(update, context):
         days = min(int(context.args[0]), 365)  # Limit to 1 year max
     
     # Send a "processing" message
-    message = update.message.reply_text("Generating BTC/USD price graph...")
+    message = await update.message.reply_text("Generating BTC/USD price graph...")
     
     # Generate the graph
-    img_str, stats = create_btc_usd_graph(days)
+    # Everyone asking for the same graph at once shares one fetch and render
+    img_str, stats = await upstream_flights.do("btc_usd_graph", days, lambda: create_btc_usd_graph(days))
     
     if img_str is None:
-        update.message.reply_text("Sorry, I couldn't retrieve the Bitcoin price data. Please try again later.")
+        await update.message.reply_text("Sorry, I couldn't retrieve the Bitcoin price data. Please try again later.")
         return
     
     # Format the change with appropriate sign and color indicator
     change_sign = "+" if stats['change_pct'] >= 0 else ""
     
     # Send the graph
-    context.bot.send_photo(
+    await context.bot.send_photo(
         chat_id=update.effective_chat.id,
-        photo=img_str,
+        photo=base64.b64decode(img_str),
         caption=f"📊 Bitcoin Price (BTC/USD) - Last {days} days\n\n"
                f"💰 Current price: ${stats['current_price']:,.2f}\n"
                f"📈 Change: {change_sign}{stats['change_pct']:.2f}% (${change_sign}{stats['change_usd']:,.2f})\n"
@@ -156,7 +163,7 @@ def handle_btc_price_command(update, context):
     )
     
     # Delete the "processing" message
-    message.delete()
+    await message.delete()
 
 def register_btcusdgraph_handler(app):
       
@@ -0,0 +1,93 @@
+"""
+Module holding per-host circuit breakers that fail calls fast while an upstream API is down.
+"""
+
+import os
+import time
+import httpx
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURES", "3"))
+RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+MAX_RESET_SECONDS = 600
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of calling a host whose breaker is open; an httpx.HTTPError, so callers treat it as any failure."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one upstream host."""
+
+    def __init__(self, host, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_reset_seconds = reset_seconds
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_started = None
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now (closed, or the half-open probe)."""
+        if self.state == CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            self._probe_started = None
+        # Only one probe at a time; everyone else keeps failing fast. A probe that never
+        # reported back (its caller was cancelled) is replaced after a cool-down.
+        if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started > self.reset_seconds):
+            self._probe_started = now
+            return
+        self.rejected += 1
+        retry_in = max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+        raise CircuitOpenError(f"{self.host} is unavailable (circuit open, retry in {retry_in:.0f}s)")
+
+    def record_success(self):
+        """A call succeeded: close the breaker."""
+        if self.state != CLOSED:
+            print(f"[DEBUG] Circuit for {self.host} closed again.")
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_seconds = self.base_reset_seconds
+        self._probe_started = None
+
+    def record_inconclusive(self):
+        """A call ended without showing whether the host is healthy: count nothing, but free the probe slot."""
+        self._probe_started = None
+
+    def record_failure(self):
+        """A call failed: open the breaker at the threshold, or re-open it after a failed probe."""
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.reset_seconds = min(self.reset_seconds * 2, MAX_RESET_SECONDS)
+        elif self.failures < self.failure_threshold:
+            return
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_started = None
+        print(f"[ERROR] Circuit for {self.host} opened after {self.failures} failures; "
+              f"failing fast for {self.reset_seconds:.0f}s.")
+
+
+_breakers = {}
+
+
+def breaker_for(host) -> CircuitBreaker:
+    """Return the breaker of a host, creating it on first use."""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(host)
+    return breaker
+
+
+def breaker_states():
+    """Return {host: (state, consecutive failures, calls rejected)} for every host seen."""
+    return {host: (b.state, b.failures, b.rejected) for host, b in sorted(_breakers.items())}
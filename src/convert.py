@@ -3,12 +3,14 @@ Module for handling the /brl command, which shows the current GBP to BRL convers
 """
 
 from datetime import datetime
-import requests
+import httpx
 from telegram import Update
 from telegram.ext import CommandHandler, CallbackContext
+from response_cache import cached_json
+from latency_budget import with_latency_budget
 
 
-def get_gbp_brl_rate() -> str:
+async def get_gbp_brl_rate() -> str:
     """
     Fetch the latest conversion rate from GBP to BRL using exchangerate.host API.
 
@@ -22,10 +24,12 @@ def get_gbp_brl_rate() -> str:
             "quotes": "GBPBRL"
         }
 
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        data = await cached_json(
+            "gbp_brl", "GBPBRL", url, params=params,
+            cacheable=lambda data: bool(data) and "GBPBRL" in data.get("quotes", {})
+        ) or {}
 
-        if response.status_code == 200 and "GBPBRL" in data["quotes"]:
+        if "GBPBRL" in data.get("quotes", {}):
             rate = data["quotes"]["GBPBRL"]
             last_update = datetime.utcfromtimestamp(data["timestamp"])
             last_updated_formatted = last_update.strftime("%y-%m-%d %H:%M")
@@ -33,11 +37,12 @@ def get_gbp_brl_rate() -> str:
             return f"1 GBP = {rate:.4f} BRL\n({last_updated_formatted})"
         print("Invalid response format from exchange rate API: %s", data)
         return "Unable to retrieve conversion rate at this time."
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         print("Error fetching GBP to BRL rate: %s", exc)
         return "Error retrieving conversion rate. Please try again later."
 
 
+@with_latency_budget()
 async def brl_command(update: Update, context: CallbackContext) -> None:
     """
     Handle the /brl command by fetching the GBP to BRL conversion rate and sending it to the chat.
@@ -46,7 +51,7 @@ async def brl_command(update: Update, context: CallbackContext) -> None:
     :param context: Telegram context object.
     """
     print("Received /brl command from user %s", update.message.from_user.id)
-    conversion_message = get_gbp_brl_rate()
+    conversion_message = await get_gbp_brl_rate()
     await context.bot.send_message(
         chat_id=update.message.chat_id, text=conversion_message
     )
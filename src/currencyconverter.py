@@ -1,9 +1,11 @@
-import requests
 from datetime import datetime
 import json
 import os
 from telegram import Update
 from telegram.ext import CommandHandler, Application
+from http_client import get
+from latency_budget import with_latency_budget
+from singleflight import upstream_flights
 
 
 class CurrencyConverter:
@@ -21,11 +23,11 @@ class CurrencyConverter:
         self.last_update = None
         self.base_currency = "USD"
         
-        # Load cache if it exists
+        # Load cache if it exists; expired or missing rates are fetched on first use
         self._load_cache()
         
     def _load_cache(self):
-        """Load cached exchange rates if they exist and aren't expired."""
+        """Load cached exchange rates if they exist."""
         if os.path.exists(self.cache_path):
             try:
                 with open(self.cache_path, 'r') as file:
@@ -33,16 +35,8 @@ class CurrencyConverter:
                     self.rates = cache.get('rates', {})
                     self.last_update = datetime.fromisoformat(cache.get('timestamp', '2000-01-01T00:00:00'))
                     self.base_currency = cache.get('base', 'USD')
-                    
-                    # Check if cache is valid
-                    time_diff = (datetime.now() - self.last_update).total_seconds()
-                    if time_diff > self.cache_duration:
-                        self._update_rates()
             except Exception as e:
                 print(f"Error loading cache: {e}")
-                self._update_rates()
-        else:
-            self._update_rates()
             
     def _save_cache(self):
         """Save current rates to cache."""
@@ -58,10 +52,13 @@ class CurrencyConverter:
         except Exception as e:
             print(f"Error saving cache: {e}")
             
-    def _update_rates(self):
-        """Fetch the latest exchange rates from the API."""
+    async def _update_rates(self):
+        """Fetch the latest exchange rates from the API (concurrent refreshes share one request)."""
+        return await upstream_flights.do("exchange_rates", self.base_url, self._fetch_rates)
+
+    async def _fetch_rates(self):
         try:
-            response = requests.get(self.base_url)
+            response = await get(self.base_url)
             data = response.json()
             
             if response.status_code == 200 and 'rates' in data:
@@ -77,7 +74,7 @@ class CurrencyConverter:
             print(f"Error updating rates: {e}")
             return False
             
-    def get_rate(self, from_currency, to_currency):
+    async def get_rate(self, from_currency, to_currency):
         """
         Get the exchange rate between two currencies.
         
@@ -90,7 +87,7 @@ class CurrencyConverter:
         """
         # Check if we need to update the cache
         if not self.last_update or (datetime.now() - self.last_update).total_seconds() > self.cache_duration:
-            self._update_rates()
+            await self._update_rates()
             
         from_currency = from_currency.upper()
         to_currency = to_currency.upper()
@@ -102,7 +99,7 @@ class CurrencyConverter:
         # Check if we have both currencies in our rates
         if from_currency not in self.rates or to_currency not in self.rates:
             # Try one more time with a fresh update
-            if self._update_rates():
+            if await self._update_rates():
                 if from_currency not in self.rates or to_currency not in self.rates:
                     return None
             else:
@@ -128,7 +125,7 @@ class CurrencyConverter:
             
         return from_rate * to_rate
     
-    def convert(self, amount, from_currency, to_currency):
+    async def convert(self, amount, from_currency, to_currency):
         """
         Convert an amount from one currency to another.
         
@@ -140,7 +137,7 @@ class CurrencyConverter:
         Returns:
             dict: Conversion result or error information
         """
-        rate = self.get_rate(from_currency, to_currency)
+        rate = await self.get_rate(from_currency, to_currency)
         
         if rate is None:
             return {
@@ -164,11 +161,11 @@ class CurrencyConverter:
             "timestamp": datetime.now().isoformat()
         }
         
-    def get_available_currencies(self):
+    async def get_available_currencies(self):
         """Get list of available currency codes."""
         # Make sure we have updated rates
         if not self.rates:
-            self._update_rates()
+            await self._update_rates()
             
         return sorted(list(self.rates.keys()))
         
@@ -180,8 +177,11 @@ class CurrencyConverter:
             "RUB", "ZAR", "TRY", "BTC", "ETH"
         ]
 
-# Example of integration with a Telegram bot
-def handle_convert_command(update, context):
+# One converter for the whole bot, so its in-memory rates serve every /convert
+converter = CurrencyConverter()
+
+@with_latency_budget()
+async def handle_convert_command(update, context):
     """
     Handler for the /convert command in a Telegram bot.
     
@@ -190,7 +190,7 @@ def handle_convert_command(update, context):
     """
     # Check if we have the right number of arguments
     if len(context.args) != 3:
-        update.message.reply_text(
+        await update.message.reply_text(
             "⚠️ Incorrect format. Use: /convert <amount> <from_currency> <to_currency>\n"
             "Example: /convert 100 USD EUR"
         )
@@ -201,11 +201,8 @@ def handle_convert_command(update, context):
         from_currency = context.args[1].upper()
         to_currency = context.args[2].upper()
         
-        # Initialize converter
-        converter = CurrencyConverter()
-        
         # Perform conversion
-        result = converter.convert(amount, from_currency, to_currency)
+        result = await converter.convert(amount, from_currency, to_currency)
         
         if result["success"]:
             # Format numbers based on common currency display practices
@@ -216,7 +213,7 @@ def handle_convert_command(update, context):
                 # Regular currencies typically use 2 decimal places
                 amount_str = f"{result['to']['amount']:.2f}"
                 
-            update.message.reply_text(
+            await update.message.reply_text(
                 f"💱 Currency Conversion Result:\n\n"
                 f"{result['from']['amount']} {result['from']['currency']} = "
                 f"{amount_str} {result['to']['currency']}\n\n"
@@ -224,22 +221,21 @@ def handle_convert_command(update, context):
                 f"Updated: {datetime.fromisoformat(result['timestamp']).strftime('%Y-%m-%d %H:%M:%S')}"
             )
         else:
-            update.message.reply_text(
+            await update.message.reply_text(
                 f"❌ Conversion error: {result['error']}\n\n"
                 f"Please check that both currencies are valid."
             )
             
     except ValueError:
-        update.message.reply_text("❌ Invalid amount. Please provide a valid number.")
+        await update.message.reply_text("❌ Invalid amount. Please provide a valid number.")
     except Exception as e:
-        update.message.reply_text(f"❌ An error occurred: {str(e)}")
+        await update.message.reply_text(f"❌ An error occurred: {str(e)}")
 
-def handle_currencies_command(update, context):
+async def handle_currencies_command(update, context):
     """Handler for a command that shows available currencies."""
-    converter = CurrencyConverter()
     popular = converter.get_popular_currencies()
     
-    update.message.reply_text(
+    await update.message.reply_text(
         f"💲 Popular Currencies:\n{', '.join(popular)}\n\n"
         f"Use /convert <amount> <from_currency> <to_currency> to convert between currencies.\n"
         f"Example: /convert 100 USD EUR"
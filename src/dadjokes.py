@@ -3,26 +3,29 @@ Module for interacting with the Dad Jokes API
 and pulling Dad Jokes using the /dadjokes command for Telegram.
 """
 
-import requests
+import httpx
 from telegram import Update
 from telegram.ext import CommandHandler, CallbackContext
+from http_client import get, json_or_none
+from latency_budget import with_latency_budget
 
 # Function to fetch a random dad joke
-def get_dad_joke() -> str:
+async def get_dad_joke() -> str:
     """
     Fetch dad joke from API
     """
     url = "https://icanhazdadjoke.com/"
     headers = {"Accept": "application/json"}
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        data = response.json()
+        response = await get(url, headers=headers)
+        data = json_or_none(response) or {}
         return data.get("joke", "Couldn't fetch a dad joke. Try again!")
-    except requests.RequestException as get_joke_error:
+    except httpx.HTTPError as get_joke_error:
         print("Error fetching dad joke: %s", {get_joke_error})
         return "Error retrieving a dad joke. Please try again later."
 
 # Telegram command handler for /dadjokes
+@with_latency_budget()
 async def dadjokes_command(update: Update, context: CallbackContext) -> None:
     """
     Handle the /dadjokes command for Telegram.
@@ -35,7 +38,7 @@ async def dadjokes_command(update: Update, context: CallbackContext) -> None:
         joke = " ".join(context.args)
     else:
         # Fetch a random joke from the API
-        joke = get_dad_joke()
+        joke = await get_dad_joke()
 
     # Send the joke
     await context.bot.send_message(chat_id=chat_id, text=joke)
@@ -0,0 +1,98 @@
+"""
+Module owning the SQLite database file, its connection settings and the thread every async query runs on.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import functools
+import os
+import sqlite3
+import threading
+
+DB_FILE = os.getenv("MESSAGES_DB", "messages.db")
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # WAL + NORMAL only fsyncs at checkpoints
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",  # 8 MB page cache
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def connect(db_file=DB_FILE):
+    """Open a connection to the database with the tuned pragmas applied."""
+    conn = sqlite3.connect(db_file)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def transaction(conn, mode=""):
+    """Run the block in one explicit transaction so DDL and catalog updates land together."""
+    if conn.in_transaction:  # already inside the caller's transaction
+        yield conn
+        return
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def ensure_schema(*statements, db_file=DB_FILE):
+    """Run a feature's CREATE TABLE IF NOT EXISTS statements in one transaction."""
+    conn = connect(db_file)
+    try:
+        with transaction(conn, "IMMEDIATE"):
+            for statement in statements:
+                conn.execute(statement)
+    finally:
+        conn.close()
+
+
+# Schemas the store modules declare on import; created by init_schemas() at startup, not at import time
+_schemas = []
+
+
+def register_schema(*statements):
+    """Declare a feature's CREATE TABLE IF NOT EXISTS statements for init_schemas()."""
+    _schemas.extend(statements)
+
+
+def init_schemas(db_file=DB_FILE):
+    """Create the tables of every imported store module."""
+    ensure_schema(*_schemas, db_file=db_file)
+
+
+# Every async read and write runs on this single thread, which owns its own connection.
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="message-db")
+_db_local = threading.local()
+
+
+def _db_call(func, *args):
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = _db_local.conn = connect()
+    return func(conn, *args)
+
+
+async def run_in_db_thread(func, *args):
+    """Run func(conn, *args) on the DB thread and await the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(_db_call, func, *args))
+
+
+def _close_db_conn():
+    conn = getattr(_db_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _db_local.conn = None
+
+
+async def close_db():
+    """Close the DB thread's connection."""
+    await asyncio.get_running_loop().run_in_executor(_db_executor, _close_db_conn)
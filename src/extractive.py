@@ -0,0 +1,130 @@
+"""
+Module selecting the salient messages of a window (TextRank over TF-IDF) before abstractive summarization.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+# Messages with fewer words than this (links and emoji don't count) carry no content of their own
+MIN_WORDS = 2
+# Cosine similarity above which a message is dropped as a repeat of an earlier one
+DUPLICATE_SIMILARITY = 0.9
+# How many earlier messages each message is compared with for near-duplicates
+DUPLICATE_LOOKBACK = 512
+# TF-IDF vectors are hashed into this many dimensions to keep memory at O(messages)
+FEATURES = 1024
+DAMPING = 0.85
+ITERATIONS = 30
+# Rows compared at once during near-duplicate detection
+BLOCK_ROWS = 256
+
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'£$€%.,:-]*[a-z0-9]|[a-z]", re.IGNORECASE)
+STOP_WORDS = frozenset(
+    "a an and are as at be but by can do for from had has have he her him his i if in into is it its "
+    "just me my no not of on or our she so that the their them then there they this to too up us was "
+    "we were what when who will with you your yes ok okay lol lmao haha yeah yep".split()
+)
+
+
+def estimate_tokens(text):
+    """Rough subword token count, for callers without a tokenizer at hand."""
+    return len(text) // 4 + 1
+
+
+def _words(text):
+    return [word.lower().strip("'.,:-") for word in WORD_PATTERN.findall(URL_PATTERN.sub(" ", text))]
+
+
+def _vectorize(documents):
+    """L2-normalized TF-IDF rows (float32, hashed features) for lists of terms."""
+    matrix = np.zeros((len(documents), FEATURES), dtype=np.float32)
+    for row, terms in enumerate(documents):
+        for term in terms:
+            matrix[row, zlib.crc32(term.encode("utf-8")) % FEATURES] += 1.0
+    present = matrix > 0
+    idf = np.log((1 + len(documents)) / (1 + present.sum(axis=0))) + 1.0
+    matrix = np.where(present, (1.0 + np.log(np.maximum(matrix, 1.0))) * idf, 0.0).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def _near_duplicates(vectors):
+    """
+    Boolean mask of rows nearly identical to one of the DUPLICATE_LOOKBACK rows
+    before them. Repeats in a chat are usually close together, and bounding the
+    look-back keeps this linear in the number of messages.
+    """
+    count = len(vectors)
+    duplicate = np.zeros(count, dtype=bool)
+    for start in range(0, count, BLOCK_ROWS):
+        end = min(start + BLOCK_ROWS, count)
+        first = max(0, start - DUPLICATE_LOOKBACK)
+        similarities = vectors[start:end] @ vectors[first:end].T
+        rows = np.arange(start, end)[:, None]
+        columns = np.arange(first, end)[None, :]
+        similarities[(columns >= rows) | (columns < rows - DUPLICATE_LOOKBACK)] = 0.0
+        duplicate[start:end] = (similarities >= DUPLICATE_SIMILARITY).any(axis=1)
+    return duplicate
+
+
+def textrank(vectors):
+    """
+    TextRank scores over the cosine-similarity graph of the rows of `vectors`.
+    The similarity matrix S = V V^T is never materialized: every power iteration
+    computes S x as V (V^T x), minus x for the self-loops.
+    """
+    count = len(vectors)
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    degree = vectors @ (vectors.T @ np.ones(count, dtype=np.float32)) - 1.0
+    degree = np.where(degree > 1e-6, degree, np.inf)  # isolated messages spread no score
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(ITERATIONS):
+        spread = scores / degree
+        scores = (1.0 - DAMPING) / count + DAMPING * (vectors @ (vectors.T @ spread) - spread)
+    return scores
+
+
+def select_salient(messages, token_budget, token_counts=None):
+    """
+    Return the salient subset of messages, in their original order.
+
+    Noise (fewer than MIN_WORDS words) and near-duplicates are always removed; when
+    what remains exceeds token_budget, the highest-ranked messages that fit are kept.
+    If nothing survives the noise filter the messages are returned unchanged.
+
+    :param token_counts: Token count of each message (estimated when omitted).
+    """
+    if token_counts is None:
+        token_counts = [estimate_tokens(message) for message in messages]
+
+    documents = [_words(message) for message in messages]
+    seen = set()
+    candidates = []
+    for i, words in enumerate(documents):
+        key = " ".join(messages[i].lower().split())
+        if len(words) >= MIN_WORDS and key not in seen:  # exact repeats are dropped across the whole window
+            seen.add(key)
+            candidates.append(i)
+    if not candidates:
+        return list(messages)
+
+    vectors = _vectorize([[w for w in documents[i] if w not in STOP_WORDS] or documents[i] for i in candidates])
+    keep = ~_near_duplicates(vectors)
+    candidates = [index for index, kept in zip(candidates, keep) if kept]
+    vectors = vectors[keep]
+
+    if sum(token_counts[i] + 1 for i in candidates) > token_budget:
+        scores = textrank(vectors)
+        chosen, used = [], 0
+        for position in np.argsort(-scores, kind="stable"):
+            cost = token_counts[candidates[position]] + 1
+            if used + cost <= token_budget:
+                chosen.append(candidates[position])
+                used += cost
+        candidates = sorted(chosen)
+
+    return [messages[i] for i in candidates]
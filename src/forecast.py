@@ -0,0 +1,113 @@
+"""
+Module fetching Open-Meteo current conditions per forecast grid cell and prefetching the most requested cells.
+"""
+
+import math
+import os
+import time
+import httpx
+from http_client import get, json_or_none
+from response_cache import response_cache, ENDPOINT_TTLS
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+GRID_DEGREES = float(os.getenv("FORECAST_GRID_DEGREES", "0.1"))
+FORECAST_INTERVAL = ENDPOINT_TTLS["forecast"][0]
+# Delay after each quarter hour before prefetching, while Open-Meteo publishes the new values
+UPDATE_DELAY_SECONDS = 60
+# How many cells to keep warm (0 disables the prefetch job), and how popular a cell must be
+PREFETCH_CELLS = int(os.getenv("FORECAST_PREFETCH_CELLS", "8"))
+PREFETCH_MIN_SCORE = 2.0
+POPULARITY_HALF_LIFE = 86400
+
+
+def grid_cell(latitude, longitude):
+    """Return the centre of the grid cell containing a point, as (latitude, longitude)."""
+    return (
+        round(round(latitude / GRID_DEGREES) * GRID_DEGREES, 4),
+        round(round(longitude / GRID_DEGREES) * GRID_DEGREES, 4),
+    )
+
+
+class CellPopularity:
+    """Exponentially decaying request counts per grid cell."""
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE):
+        self.half_life = half_life
+        self._scores = {}  # cell -> (score, time of the last update)
+
+    def _decayed(self, score, updated, now):
+        return score * math.pow(0.5, (now - updated) / self.half_life)
+
+    def record(self, cell):
+        """Count one request for a cell."""
+        now = time.time()
+        score, updated = self._scores.get(cell, (0.0, now))
+        self._scores[cell] = (self._decayed(score, updated, now) + 1, now)
+
+    def top(self, count, min_score=PREFETCH_MIN_SCORE):
+        """Return up to `count` cells scoring at least min_score, most popular first; forgets cold cells."""
+        now = time.time()
+        scores = {cell: self._decayed(score, updated, now) for cell, (score, updated) in self._scores.items()}
+        for cell, score in scores.items():
+            if score < 0.05:
+                del self._scores[cell]
+        ranked = sorted((cell for cell, score in scores.items() if score >= min_score), key=scores.get, reverse=True)
+        return ranked[:count]
+
+
+popularity = CellPopularity()
+
+
+def _cell_key(cell):
+    return f"{cell[0]:.4f},{cell[1]:.4f}"
+
+
+async def _fetch_cells(keys):
+    """Fetch the forecasts of several cells (given by key) with one multi-coordinate request."""
+    cells = [key.split(",") for key in keys]
+    response = await get(FORECAST_URL, params={
+        "latitude": ",".join(latitude for latitude, _longitude in cells),
+        "longitude": ",".join(longitude for _latitude, longitude in cells),
+        "current_weather": "true",
+    })
+    data = json_or_none(response)
+    if data is None:
+        return [None] * len(keys)
+    return data if isinstance(data, list) else [data]  # a single location comes back unwrapped
+
+
+async def current_weather_many(points):
+    """
+    Return the Open-Meteo forecast payloads (with "current_weather") for several (latitude, longitude)
+    points, in order, None for any that couldn't be fetched. All uncached cells share one request.
+    """
+    cells = [grid_cell(latitude, longitude) for latitude, longitude in points]
+    for cell in set(cells):
+        popularity.record(cell)
+    return await response_cache.get_many_or_fetch(
+        "forecast", [_cell_key(cell) for cell in cells], _fetch_cells, cacheable=bool
+    )
+
+
+async def current_weather(latitude, longitude):
+    """Return the Open-Meteo forecast payload for a point's grid cell, or None."""
+    return (await current_weather_many([(latitude, longitude)]))[0]
+
+
+def seconds_until_next_update(now=None):
+    """Seconds until the next quarter hour plus UPDATE_DELAY_SECONDS."""
+    now = time.time() if now is None else now
+    return FORECAST_INTERVAL - (now - UPDATE_DELAY_SECONDS) % FORECAST_INTERVAL
+
+
+async def prefetch_forecasts(_context=None):
+    """Refresh the forecasts of the most requested grid cells (job_queue job)."""
+    cells = popularity.top(PREFETCH_CELLS)
+    if not cells:
+        return
+    try:
+        await response_cache.prefetch_many("forecast", [_cell_key(cell) for cell in cells], _fetch_cells, cacheable=bool)
+    except httpx.HTTPError as e:
+        print(f"[ERROR] Prefetching forecasts for {len(cells)} popular locations failed: {e!r}")
+        return
+    print(f"[DEBUG] Prefetched forecasts for {len(cells)} popular locations in one request.")
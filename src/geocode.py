@@ -0,0 +1,91 @@
+"""
+Module turning /weather locations into coordinates: postcode index first, then the stored geocodes, then online.
+"""
+
+import re
+from http_client import get, json_or_none
+from geocode_store import fetch_geocodes, save_geocode
+from postcode_index import postcode_index, outward_code, POSTCODE_PATTERN
+from singleflight import upstream_flights
+
+COUNTRY_SUFFIXES = ("uk", "united kingdom")
+
+
+def normalize_location(location):
+    """Return the canonical form of a location: "CH4 8AB" for postcodes, else e.g. "st albans"."""
+    words = re.sub(r"[^\w\s]", " ", location.casefold()).split()
+    text = " ".join(words)
+    for suffix in COUNTRY_SUFFIXES:
+        if text.endswith(" " + suffix):
+            text = text[:-len(suffix) - 1]
+    match = POSTCODE_PATTERN.match(text.upper())
+    if match:
+        return " ".join(part for part in match.groups() if part)
+    return text
+
+
+class Geocoder:
+    """Resolves locations through the postcode index, then the persistent cache, then online."""
+
+    def __init__(self):
+        self._known = None
+        self.index_hits = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def _loaded(self):
+        if self._known is None:
+            self._known = await fetch_geocodes()
+        return self._known
+
+    async def _lookup_postcode(self, query):
+        response = await get(
+            "https://nominatim.openstreetmap.org/search", params={"format": "json", "q": f"{query}, UK"}
+        )
+        results = json_or_none(response)
+        return (float(results[0]["lat"]), float(results[0]["lon"])) if results else None
+
+    async def _lookup_name(self, query):
+        response = await get(
+            "https://geocoding-api.open-meteo.com/v1/search",
+            params={"name": query, "count": 1, "language": "en", "format": "json"},
+        )
+        data = json_or_none(response)
+        if not data or not data.get("results"):
+            return None
+        return float(data["results"][0]["latitude"]), float(data["results"][0]["longitude"])
+
+    async def _resolve(self, query, is_postcode):
+        coordinates = await self._lookup_postcode(query) if is_postcode else None
+        if coordinates is None:
+            coordinates = await self._lookup_name(query)
+        if coordinates is not None:
+            self._known[query] = coordinates
+            await save_geocode(query, *coordinates)
+            print(f"[DEBUG] Geocoded {query!r} to {coordinates[0]}, {coordinates[1]}")
+        return coordinates
+
+    async def geocode(self, location):
+        """
+        Return (latitude, longitude) for a place name or UK postcode, or None if it can't be found.
+        Network failures raise httpx.HTTPError.
+        """
+        query = normalize_location(location)
+        if not query:
+            return None
+        code = outward_code(query)
+        if code is not None:
+            coordinates = postcode_index.lookup(code)
+            if coordinates is not None:
+                self.index_hits += 1
+                return coordinates
+
+        known = await self._loaded()
+        if query in known:
+            self.hits += 1
+            return known[query]
+        self.misses += 1
+        return await upstream_flights.do("geocode", query, lambda: self._resolve(query, code is not None))
+
+
+geocoder = Geocoder()
@@ -0,0 +1,33 @@
+"""
+Module storing the coordinates of every location geocoded online.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS geocodes (query TEXT PRIMARY KEY, latitude REAL, longitude REAL)"
+
+
+def read_geocodes(conn):
+    """Return {normalized location: (latitude, longitude)} for every location geocoded so far."""
+    return {query: (lat, lon) for query, lat, lon in conn.execute("SELECT query, latitude, longitude FROM geocodes")}
+
+
+def write_geocode(conn, query, latitude, longitude):
+    """Remember the coordinates of a normalized location."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute(
+            "INSERT OR REPLACE INTO geocodes (query, latitude, longitude) VALUES (?, ?, ?)",
+            (query, latitude, longitude)
+        )
+
+
+async def fetch_geocodes():
+    """Await {normalized location: (latitude, longitude)} for all remembered locations."""
+    return await run_in_db_thread(read_geocodes)
+
+
+async def save_geocode(query, latitude, longitude):
+    """Await remembering a location's coordinates."""
+    await run_in_db_thread(write_geocode, query, latitude, longitude)
+
+
+register_schema(SCHEMA)
@@ -6,9 +6,11 @@ import sqlite3
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 from telegram.error import TelegramError
-from requests.exceptions import RequestException
-from message_store import store_message
-from summarizer import fetch_messages, summarize_messages
+from message_store import store, last_message_id
+from message_buffer import recent_messages
+from summarizer import summarize_window
+from summary_cache import summary_cache
+from triggers import trigger_registry, send_trigger_response
 
 SUMMARY_OPTIONS = {
     "1h": 3600,
@@ -18,19 +20,6 @@ SUMMARY_OPTIONS = {
     "24h": 86400
 }
 
-KEYWORDS = {
-    "cunts": "🍑",
-}
-
-STICKERS = {
-    "not worthwhile": "CAACAgQAAxkBAAEN7OJnw47vgltrMdG3wA9dbm8P-Gq36gACPA0AAscocVEUPP2IDSRDKDYE"
-}
-
-GIFS = {
-    "informer": "https://media3.giphy.com/media/"
-    "v1.Y2lkPTc5MGI3NjExcG0yODg0dXF2bml5YWhrc24ycmpxOTl3dnF6cGo0cmV2N2N4Y2QzOCZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9Zw/12jpDs6Z9rSQNO/giphy.gif",
-}
-
 
 async def summary_command(update: Update, _context: CallbackContext):
     """Send private inline keyboard for summary timeframe selection."""
@@ -71,13 +60,15 @@ async def handle_summary_selection(update: Update, context: CallbackContext):
         now = int(time.time())
         start_time = now - timeframe
 
-        print(f"[DEBUG] Fetching messages from last {selected_option}...")
-
-        messages = fetch_messages(chat_id, start_time)
+        print(f"[DEBUG] Summarizing messages from last {selected_option}...")
 
-        print(f"[DEBUG] Retrieved {len(messages)} messages.")
-
-        summary = summarize_messages(messages)
+        # Same chat, same window and no new messages since: reuse (or wait for) the same summary
+        cache_key = (chat_id, selected_option, await last_message_id(chat_id))
+        summary = await summary_cache.get_or_compute(
+            cache_key,
+            lambda: summarize_window(chat_id, start_time),
+            cacheable=lambda text: not text.startswith("Error")
+        )
 
         print(f"[DEBUG] Sending summary to user {user_id}.")
 
@@ -93,8 +84,6 @@ async def handle_summary_selection(update: Update, context: CallbackContext):
         print(f"[ERROR] Database error: {e}")
     except TelegramError as e:
         print(f"[ERROR] Telegram API error: {e}")
-    except RequestException as e:
-        print(f"[ERROR] Network issue: {e}")
     except KeyError as e:
         print(f"[ERROR] Invalid dictionary key: {e}")
     except AttributeError as e:
@@ -104,9 +93,8 @@ async def handle_message(update: Update, context: CallbackContext) -> None:
     """
     Process incoming messages and respond with a sticker, emoji or GIF based on triggers.
 
-    Logs the message with a timestamp, then checks for any sticker or emoji triggers.
-    If a sticker trigger is found, sends the corresponding sticker and stops further processing.
-    Otherwise, checks for emoji triggers and reacts to the first match found.
+    Logs the message with a timestamp, then matches it against the chat's triggers
+    in a single pass and replies to the best match: a GIF, else a sticker, else an emoji.
     """
     try:
         if not update.message or not update.message.text:
@@ -119,28 +107,20 @@ async def handle_message(update: Update, context: CallbackContext) -> None:
 
         print(f"✅ [BOT] Received message from {user_id} in chat {chat_id}: {message_text}")
 
-        # ✅ Ensure message is stored
-        store_message(chat_id, user_id, message_text)
+        # ✅ Ensure message is stored, and keep a copy in memory for short summaries
+        timestamp = int(time.time())
+        message_id = await store(chat_id, user_id, message_text, timestamp)
+        recent_messages.append(chat_id, message_id, timestamp, message_text)
 
     except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
         print(f"[ERROR] Database error: {e}")
     except AttributeError as e:
         print(f"[ERROR] Message object is missing: {e}")
 
-    # Check for GIF triggers
-    for keyword, gif_url in GIFS.items():
-        if keyword in message_text:
-            await context.bot.send_animation(chat_id=chat_id, animation=gif_url)
-            return
-
-    # Check for sticker triggers
-    for keyword, sticker_id in STICKERS.items():
-        if keyword in message_text:
-            await context.bot.send_sticker(chat_id=chat_id, sticker=sticker_id)
-            return
-
-    # Check for emoji triggers
-    for keyword, emoji in KEYWORDS.items():
-        if keyword in message_text:
-            await context.bot.send_message(chat_id=chat_id, text=emoji)
-            return
+    # One pass over the text finds the chat's GIF, sticker or emoji trigger, if any
+    try:
+        match = await trigger_registry.match(chat_id, message_text)
+        if match:
+            await send_trigger_response(context.bot, chat_id, *match)
+    except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+        print(f"[ERROR] Database error: {e}")
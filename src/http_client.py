@@ -0,0 +1,132 @@
+"""
+Module holding the shared asynchronous HTTP client used by every upstream integration.
+"""
+
+import asyncio
+import os
+import random
+import httpx
+from circuit_breaker import breaker_for
+from latency_budget import remaining, LatencyBudgetExceeded
+
+# Seconds to wait for a connection and for any single read/write
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+# Extra attempts after a failed GET (connection error, timeout, 429 or 5xx)
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+RETRY_BACKOFF_SECONDS = 0.5
+MAX_RETRY_AFTER_SECONDS = 10
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Don't start an attempt with less than this left of the command's latency budget
+MIN_ATTEMPT_SECONDS = 0.5
+
+LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=60)
+USER_AGENT = "talbot/1.0 (Telegram bot; +https://github.com/jgirolamo/talbot)"
+
+_client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client  # pylint: disable=global-statement
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=LIMITS,
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+    return _client
+
+
+def _retry_delay(attempt, response=None):
+    """Backoff before the next attempt: Retry-After when the server sent one, else exponential with jitter."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+    return RETRY_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random())
+
+
+def _attempt_timeout(timeout):
+    """
+    Timeout for the next attempt, cut down to what is left of the command's latency budget,
+    and whether it had to be cut (a timeout then says nothing about the host's health).
+    """
+    left = remaining()
+    if left is None or left >= (timeout or READ_TIMEOUT):
+        return timeout, False
+    if left <= 0:
+        raise LatencyBudgetExceeded("latency budget spent")
+    return httpx.Timeout(left, connect=min(CONNECT_TIMEOUT, left)), True
+
+
+def json_or_none(response, statuses=(200,)):
+    """Return a response's parsed JSON, or None for another status or a body that isn't JSON (an HTML error page)."""
+    if response.status_code not in statuses:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _fits_budget(delay):
+    left = remaining()
+    return left is None or left > delay + MIN_ATTEMPT_SECONDS
+
+
+async def get(url, *, params=None, headers=None, timeout=None, retries=RETRIES, on_attempt=None) -> httpx.Response:
+    """
+    GET a URL with the shared client, retrying transient failures.
+
+    Calls to a host whose circuit breaker is open fail at once, and inside a
+    command with a latency budget no attempt or retry outlives the budget.
+
+    :param on_attempt: Optional callable run each time a request is actually sent (e.g. to count quota use).
+    :return: The final response, whatever its status; callers check it as before.
+    :raises httpx.HTTPError: On a transport error after the retries, CircuitOpenError
+        for an unavailable host, or LatencyBudgetExceeded once the budget is spent.
+    """
+    client = get_client()
+    host = httpx.URL(url).host  # logged instead of the URL, which may carry an API key
+    breaker = breaker_for(host)
+    attempt = 0
+    while True:
+        attempt_timeout, shortened = _attempt_timeout(timeout)
+        breaker.before_call()
+        kwargs = {"params": params, "headers": headers}
+        if attempt_timeout is not None:
+            kwargs["timeout"] = attempt_timeout
+        if on_attempt is not None:
+            on_attempt()
+        try:
+            response = await client.get(url, **kwargs)
+        except httpx.TransportError as exc:
+            if shortened and isinstance(exc, httpx.TimeoutException):
+                breaker.record_inconclusive()  # the budget ran out, not the host's full timeout
+            else:
+                breaker.record_failure()
+            delay = _retry_delay(attempt)
+            if attempt == retries or not _fits_budget(delay):
+                raise
+            print(f"[ERROR] GET to {host} failed ({exc!r}); retrying.")
+        else:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            delay = _retry_delay(attempt, response)
+            if response.status_code not in RETRY_STATUSES or attempt == retries or not _fits_budget(delay):
+                return response
+            print(f"[ERROR] GET to {host} returned {response.status_code}; retrying.")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def close_http_client(_application=None):
+    """Close the shared client and its pooled connections (used from the post_shutdown hook)."""
+    global _client  # pylint: disable=global-statement
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,75 +1,180 @@
 """
-Module for interacting with the OMDB API and handling the /imdb command for Telegram.
+Module for interacting with the OMDB API and handling the /imdb command and inline movie queries for Telegram.
 """
 
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timezone
 import os
-import requests
-from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import CommandHandler, CallbackContext, CallbackQueryHandler
+import httpx
+from telegram import (
+    Update, InlineKeyboardMarkup, InlineKeyboardButton, InlineQueryResultArticle, InputTextMessageContent
+)
+from telegram.error import TelegramError
+from telegram.ext import CommandHandler, CallbackContext, CallbackQueryHandler, InlineQueryHandler
+from http_client import get, json_or_none
+from response_cache import response_cache
+from latency_budget import with_latency_budget, clear_budget
+from title_index import title_index, normalize_title
 
 # OMDB API Key (Get one from https://www.omdbapi.com/apikey.aspx)
 OMDB_API_KEY = os.getenv("OMDB_API_KEY")
 if not OMDB_API_KEY:
     raise ValueError("OMDB_API_KEY environment variable is not set!")
 
-def search_movies(movie_name: str):
+OMDB_URL = "https://www.omdbapi.com/"
+# Requests per day allowed by the OMDB plan (1,000 on the free one); prefetches stop at PREFETCH_QUOTA_SHARE of it
+OMDB_DAILY_LIMIT = int(os.getenv("OMDB_DAILY_LIMIT", "1000"))
+PREFETCH_QUOTA_SHARE = 0.8
+RESULTS_SHOWN = 5
+INLINE_RESULTS = 10
+# Pause in typing before an inline query the title index can't answer goes to OMDB
+INLINE_DEBOUNCE_SECONDS = 0.6
+INLINE_MIN_QUERY = 3
+UNANSWERED_SIZE = 1024
+
+
+class OmdbQuota:
+    """Counts the OMDB requests made per UTC day."""
+
+    def __init__(self, daily_limit=OMDB_DAILY_LIMIT):
+        self.daily_limit = daily_limit
+        self._day = None
+        self._used = 0
+
+    @property
+    def used(self):
+        """OMDB requests made so far today (UTC)."""
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self._day, self._used = today, 0
+        return self._used
+
+    def spend(self):
+        """Count one request sent to OMDB."""
+        self._used = self.used + 1
+
+    def exhaust(self):
+        """OMDB refused a request: count the rest of the day as used."""
+        self._used = max(self.used, self.daily_limit)
+
+    def allows_prefetch(self):
+        """Whether speculative requests may still be made today without eating into the share kept for lookups."""
+        return self.used < self.daily_limit * PREFETCH_QUOTA_SHARE
+
+
+omdb_quota = OmdbQuota()
+_prefetches = set()  # running detail prefetches, referenced until done
+_inline_searches = set()  # running delayed inline searches, referenced until done
+_pending_inline = {}  # user id -> their inline search still waiting for a pause in typing
+_unanswered = OrderedDict()  # normalized inline queries OMDB had no results for, oldest first
+
+
+async def _omdb(endpoint: str, key: str, params: dict) -> dict:
+    """Return the OMDB JSON for a query, from the response cache when possible (only hits are cached)."""
+    async def fetch():
+        # Every attempt counts against the quota, retries included
+        response = await get(OMDB_URL, params={"apikey": OMDB_API_KEY, **params}, on_attempt=omdb_quota.spend)
+        data = json_or_none(response, (200, 401))
+        if data and "limit reached" in data.get("Error", "").lower():
+            print("[ERROR] OMDB daily request limit reached.")
+            omdb_quota.exhaust()
+        return data if response.status_code == 200 else None
+
+    data = await response_cache.get_or_fetch(
+        endpoint, key, fetch, cacheable=lambda data: bool(data) and data.get("Response") == "True"
+    )
+    if data and data.get("Response") == "True":
+        await title_index.add(data.get("Search") or [data])
+    return data or {}
+
+
+def _search_key(movie_name: str) -> str:
+    return " ".join(movie_name.lower().split())
+
+
+async def _search(movie_name: str) -> dict:
+    return await _omdb("omdb_search", _search_key(movie_name), {"s": movie_name})
+
+
+async def _title(movie_id: str) -> dict:
+    return await _omdb("omdb_title", movie_id, {"i": movie_id, "plot": "short"})
+
+
+async def prefetch_details(movie_ids) -> None:
+    """Load the details of search results into the cache while their buttons are on screen."""
+    clear_budget()  # runs beside the command, not within its latency budget
+
+    async def prefetch(movie_id):
+        if omdb_quota.allows_prefetch():
+            await _title(movie_id)
+
+    results = await asyncio.gather(*(prefetch(movie_id) for movie_id in movie_ids), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        print(f"[ERROR] Prefetching {len(failures)} of {len(movie_ids)} OMDB titles failed: {failures[0]!r}")
+
+
+async def search_movies(movie_name: str):
     """
     Fetch a list of potential movie matches from the OMDB API.
 
     :param movie_name: The name of the movie to search for.
     :return: A list of movie matches or None if no matches are found.
     """
-    url = f"https://www.omdbapi.com/?apikey={OMDB_API_KEY}&s={movie_name}"
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        data = await _search(movie_name)
 
         if data.get("Response") == "True" and "Search" in data:
             return data["Search"]
         return None
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         print("Error fetching movie search results: %s", exc)
         return None
 
 
-def get_movie_info(movie_id: str) -> str:
+def format_movie(data: dict) -> str:
+    """Format an OMDB title response as a Markdown message."""
+    title = data["Title"]
+    year = data["Year"]
+    plot = data["Plot"]
+    imdb_id = data["imdbID"]
+    imdb_rating = data["imdbRating"]
+    # Extract Rotten Tomatoes rating if available
+    rotten_tomatoes_rating = "N/A"
+    if "Ratings" in data:
+        for rating in data["Ratings"]:
+            if rating["Source"] == "Rotten Tomatoes":
+                rotten_tomatoes_rating = rating["Value"]
+                break
+
+    return (
+        f"🎬 [{title}](https://www.imdb.com/title/{imdb_id}/) ({year})\n"
+        f"⭐ IMDb Score: {imdb_rating}/10\n"
+        f"🍅 Rotten Tomatoes: {rotten_tomatoes_rating}\n"
+        f"📖 {plot}"
+    )
+
+
+async def get_movie_info(movie_id: str) -> str:
     """
     Fetch detailed movie information from the OMDB API.
 
     :param movie_id: The IMDb ID of the movie.
     :return: A formatted string with movie details or an error message.
     """
-    url = f"http://www.omdbapi.com/?i={movie_id}&apikey={OMDB_API_KEY}&plot=short"
     try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
-
-        if data["Response"] == "True":
-            title = data["Title"]
-            year = data["Year"]
-            plot = data["Plot"]
-            imdb_id = data["imdbID"]
-            imdb_rating = data["imdbRating"]
-            # Extract Rotten Tomatoes rating if available
-            rotten_tomatoes_rating = "N/A"
-            if "Ratings" in data:
-                for rating in data["Ratings"]:
-                    if rating["Source"] == "Rotten Tomatoes":
-                        rotten_tomatoes_rating = rating["Value"]
-                        break
-
-            return (
-                f"🎬 [{title}](https://www.imdb.com/title/{imdb_id}/) ({year})\n"
-                f"⭐ IMDb Score: {imdb_rating}/10\n"
-                f"🍅 Rotten Tomatoes: {rotten_tomatoes_rating}\n"
-                f"📖 {plot}"
-            )
+        data = await _title(movie_id)
+
+        if data.get("Response") == "True":
+            return format_movie(data)
         return "Movie details not found. Please try again."
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         print("Error fetching movie details: %s", exc)
         return "Error retrieving movie details. Please try again later."
 
 
+@with_latency_budget()
 async def imdb_command(update: Update, context: CallbackContext) -> None:
     """
     Handle the /imdb command for Telegram. Searches for movies and displays results.
@@ -82,7 +187,7 @@ async def imdb_command(update: Update, context: CallbackContext) -> None:
         return
 
     movie_name = " ".join(context.args)
-    movie_results = search_movies(movie_name)
+    movie_results = await search_movies(movie_name)
 
     if not movie_results:
         await context.bot.send_message(
@@ -92,7 +197,7 @@ async def imdb_command(update: Update, context: CallbackContext) -> None:
         return
 
     if len(movie_results) == 1:
-        movie_info = get_movie_info(movie_results[0]["imdbID"])
+        movie_info = await get_movie_info(movie_results[0]["imdbID"])
         await context.bot.send_message(
             chat_id=update.message.chat_id,
             text=movie_info,
@@ -100,8 +205,13 @@ async def imdb_command(update: Update, context: CallbackContext) -> None:
         )
         return
 
+    shown = movie_results[:RESULTS_SHOWN]
+    task = asyncio.ensure_future(prefetch_details([movie["imdbID"] for movie in shown]))
+    _prefetches.add(task)
+    task.add_done_callback(_prefetches.discard)
+
     keyboard = []
-    for movie in movie_results[:5]:
+    for movie in shown:
         keyboard.append([
             InlineKeyboardButton(
                 f"{movie['Title']} ({movie['Year']})",
@@ -117,6 +227,7 @@ async def imdb_command(update: Update, context: CallbackContext) -> None:
     )
 
 
+@with_latency_budget()
 async def movie_selection(update: Update, _context: CallbackContext) -> None:
     """
     Callback handler for movie selection from inline buttons.
@@ -127,14 +238,89 @@ async def movie_selection(update: Update, _context: CallbackContext) -> None:
     await query.answer()
 
     movie_id = query.data.split("_")[1]
-    movie_info = get_movie_info(movie_id)
+    movie_info = await get_movie_info(movie_id)
     await query.edit_message_text(text=movie_info, parse_mode="Markdown")
 
 
+def _inline_result(imdb_id, title, year, kind, poster) -> InlineQueryResultArticle:
+    """A suggestion posting the title's details when they are cached, else its IMDb link."""
+    details = response_cache.peek("omdb_title", imdb_id)
+    if details and details.get("Response") == "True":
+        text = format_movie(details)
+    else:
+        text = f"🎬 [{title}](https://www.imdb.com/title/{imdb_id}/) ({year})"
+    return InlineQueryResultArticle(
+        id=imdb_id,
+        title=f"{title} ({year})" if year else title,
+        description=kind.capitalize() or None,
+        thumbnail_url=poster if poster.startswith("http") else None,
+        input_message_content=InputTextMessageContent(text, parse_mode="Markdown"),
+    )
+
+
+async def _search_upstream(text: str, query: str) -> None:
+    """Search OMDB for an inline query the index can't answer; results land in the index."""
+    try:
+        data = await _search(text)
+    except httpx.HTTPError as exc:
+        print(f"[ERROR] Inline OMDB search failed: {exc!r}")
+        return
+    if data.get("Response") != "True" and data.get("Error"):  # "Movie not found!", "Too many results."
+        _unanswered[query] = True
+        while len(_unanswered) > UNANSWERED_SIZE:
+            _unanswered.popitem(last=False)
+
+
+async def _answer_inline(inline_query, matches) -> None:
+    try:
+        await inline_query.answer([_inline_result(*match) for match in matches])
+    except TelegramError as e:
+        print(f"[ERROR] Telegram API error: {e}")
+
+
+async def _answer_after_pause(inline_query, text: str, query: str) -> None:
+    """Search OMDB once the user has stopped typing, then answer from the grown index."""
+    user_id = inline_query.from_user.id
+    await asyncio.sleep(INLINE_DEBOUNCE_SECONDS)
+    if _pending_inline.get(user_id) is asyncio.current_task():
+        del _pending_inline[user_id]  # past the pause: a newer query no longer cancels this search
+    await _search_upstream(text, query)
+    await _answer_inline(inline_query, title_index.search(query, INLINE_RESULTS))
+
+
+@with_latency_budget()
+async def inline_movie_query(update: Update, _context: CallbackContext) -> None:
+    """
+    Handle inline queries ("@bot dune"): suggest titles from the local index as the user types,
+    searching OMDB after a pause in typing when the index has too few matches.
+    """
+    inline_query = update.inline_query
+    text = inline_query.query.strip()
+    query = normalize_title(text)
+    user_id = inline_query.from_user.id
+    waiting = _pending_inline.pop(user_id, None)
+    if waiting is not None:
+        waiting.cancel()  # the user kept typing; only their newest query is answered
+
+    await title_index.load()
+    matches = title_index.search(query, INLINE_RESULTS)
+    if (len(matches) < INLINE_RESULTS and len(query) >= INLINE_MIN_QUERY
+            and query not in _unanswered and response_cache.peek("omdb_search", _search_key(text)) is None
+            and omdb_quota.allows_prefetch()):
+        # Return at once so the user's next keystroke is handled (and cancels this wait)
+        task = asyncio.ensure_future(_answer_after_pause(inline_query, text, query))
+        _inline_searches.add(task)
+        task.add_done_callback(_inline_searches.discard)
+        _pending_inline[user_id] = task
+        return
+    await _answer_inline(inline_query, matches)
+
+
 def register_imdb_handler(app) -> None:
     """
-    Register the /imdb command and its callback query handler with the Telegram application.
+    Register the /imdb command, its callback query handler and the inline movie search with the Telegram application.
     """
-    print("Registering /imdb command handler and callback query handler")
+    print("Registering /imdb command handler, callback query handler and inline query handler")
     app.add_handler(CommandHandler("imdb", imdb_command))
     app.add_handler(CallbackQueryHandler(movie_selection, pattern="^movie_.*"))
+    app.add_handler(InlineQueryHandler(inline_movie_query))
@@ -0,0 +1,44 @@
+"""
+Module enforcing an end-to-end latency budget on command handlers.
+"""
+
+import contextvars
+import functools
+import os
+import time
+import httpx
+
+COMMAND_BUDGET_SECONDS = float(os.getenv("COMMAND_BUDGET_SECONDS", "8"))
+
+_deadline = contextvars.ContextVar("latency_deadline", default=None)
+
+
+class LatencyBudgetExceeded(httpx.TimeoutException):
+    """Raised when a command has no time left for another upstream request."""
+
+
+def remaining():
+    """Seconds left in the current budget, or None outside a budgeted command."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clear_budget():
+    """Run the rest of the current task without a budget (e.g. background refreshes spawned by a command)."""
+    _deadline.set(None)
+
+
+def with_latency_budget(seconds=COMMAND_BUDGET_SECONDS):
+    """Decorator giving an async handler a deadline `seconds` from its start (nested budgets keep the tighter one)."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            deadline = time.monotonic() + seconds
+            outer = _deadline.get()
+            token = _deadline.set(deadline if outer is None else min(outer, deadline))
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                _deadline.reset(token)
+        return wrapper
+    return decorator
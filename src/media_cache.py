@@ -0,0 +1,70 @@
+"""
+Module reusing Telegram file_ids for media the bot sends repeatedly.
+"""
+
+from telegram.error import BadRequest
+from media_store import fetch_media_files, save_media_file, forget_media_file
+
+# kind -> (Bot method, its media argument)
+SENDERS = {
+    "gif": ("send_animation", "animation"),
+    "sticker": ("send_sticker", "sticker"),
+}
+
+
+def sent_file_id(message, kind):
+    """Return the file_id of the media in a message the bot just sent (None if absent)."""
+    if kind == "gif":
+        media = message.animation or message.document  # Telegram may keep a GIF as a document
+    else:
+        media = message.sticker
+    return media.file_id if media else None
+
+
+class MediaCache:
+    """Persistent media key -> Telegram file_id map, loaded into memory on first use."""
+
+    def __init__(self):
+        self._files = None
+        self.hits = 0
+        self.misses = 0
+
+    async def _loaded(self):
+        if self._files is None:
+            self._files = await fetch_media_files()
+        return self._files
+
+    async def send(self, bot, chat_id, kind, key, source, **kwargs):
+        """
+        Send media to a chat, by its cached file_id when there is one.
+
+        :param key: Stable identifier of the media (e.g. its URL).
+        :param source: What to send when no usable file_id is cached: URL or file_id.
+        :return: The sent Message.
+        """
+        method, argument = SENDERS[kind]
+        send = getattr(bot, method)
+        files = await self._loaded()
+
+        file_id = files.get(key)
+        if file_id is not None:
+            try:
+                message = await send(chat_id=chat_id, **{argument: file_id}, **kwargs)
+                self.hits += 1
+                return message
+            except BadRequest as e:
+                print(f"[ERROR] Cached file_id for {key} rejected ({e}); sending from source.")
+                files.pop(key, None)
+                await forget_media_file(key)
+
+        self.misses += 1
+        message = await send(chat_id=chat_id, **{argument: source}, **kwargs)
+        new_id = sent_file_id(message, kind)
+        if new_id and new_id != file_id:
+            files[key] = new_id
+            await save_media_file(key, new_id)
+            print(f"[DEBUG] Cached file_id for {kind} {key}.")
+        return message
+
+
+media_cache = MediaCache()
@@ -0,0 +1,41 @@
+"""
+Module storing the Telegram file_ids of media the bot has sent.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS media_files (media_key TEXT PRIMARY KEY, file_id TEXT)"
+
+
+def read_media_files(conn):
+    """Return {media_key: file_id} for every media file Telegram has already stored for the bot."""
+    return dict(conn.execute("SELECT media_key, file_id FROM media_files").fetchall())
+
+
+def write_media_file(conn, media_key, file_id):
+    """Remember the Telegram file_id of a media file."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute("INSERT OR REPLACE INTO media_files (media_key, file_id) VALUES (?, ?)", (media_key, file_id))
+
+
+def delete_media_file(conn, media_key):
+    """Forget a media file's file_id."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute("DELETE FROM media_files WHERE media_key = ?", (media_key,))
+
+
+async def fetch_media_files():
+    """Await {media_key: file_id} for all remembered media files."""
+    return await run_in_db_thread(read_media_files)
+
+
+async def save_media_file(media_key, file_id):
+    """Await remembering a media file's file_id."""
+    await run_in_db_thread(write_media_file, media_key, file_id)
+
+
+async def forget_media_file(media_key):
+    """Await dropping a media file's file_id."""
+    await run_in_db_thread(delete_media_file, media_key)
+
+
+register_schema(SCHEMA)
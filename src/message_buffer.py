@@ -0,0 +1,94 @@
+"""
+Module holding a bounded, per-chat in-memory ring buffer of recent messages.
+"""
+
+from collections import deque, OrderedDict
+import time
+
+MAX_MESSAGES_PER_CHAT = 2000
+MAX_CHARS_PER_CHAT = 256 * 1024
+MAX_TOTAL_CHARS = 16 * 1024 * 1024  # across all chats
+
+
+class _ChatRing:
+    """Messages of one chat, oldest first, plus the time since which they are complete."""
+
+    __slots__ = ("entries", "chars", "complete_since")
+
+    def __init__(self, complete_since):
+        self.entries = deque()  # (message_id, timestamp, text)
+        self.chars = 0
+        self.complete_since = complete_since
+
+
+class MessageBuffer:
+    """
+    Per-chat ring buffers capped per chat (messages and characters) and globally
+    (characters). When the global cap is hit, the chat that was written least
+    recently is evicted as a whole.
+    """
+
+    def __init__(self, max_messages_per_chat=MAX_MESSAGES_PER_CHAT,
+                 max_chars_per_chat=MAX_CHARS_PER_CHAT, max_total_chars=MAX_TOTAL_CHARS):
+        self.max_messages_per_chat = max_messages_per_chat
+        self.max_chars_per_chat = max_chars_per_chat
+        self.max_total_chars = max_total_chars
+        # Nothing from before this process started is in memory
+        self.started_at = int(time.time())
+        self.total_chars = 0
+        self.hits = 0
+        self.misses = 0
+        self._chats = OrderedDict()  # chat_id -> _ChatRing, least recently written first
+        # Chats without a ring are complete since this time: evicted chats keep no state of their own
+        self.evicted_until = self.started_at
+
+    def append(self, chat_id, message_id, timestamp, text):
+        """Record a message that was just stored."""
+        ring = self._chats.get(chat_id)
+        if ring is None:
+            ring = self._chats[chat_id] = _ChatRing(self.evicted_until)
+        else:
+            self._chats.move_to_end(chat_id)
+
+        ring.entries.append((message_id, timestamp, text))
+        ring.chars += len(text)
+        self.total_chars += len(text)
+
+        while ring.entries and (len(ring.entries) > self.max_messages_per_chat
+                                or ring.chars > self.max_chars_per_chat):
+            self._drop_oldest(ring)
+        while self.total_chars > self.max_total_chars and self._chats:
+            self._evict(next(iter(self._chats)))
+
+    def window(self, chat_id, start_time, end_time=None):
+        """
+        Return the chat's messages with start_time <= timestamp < end_time, oldest
+        first, or None if the buffer may be missing some of them.
+        """
+        ring = self._chats.get(chat_id)
+        complete_since = ring.complete_since if ring else self.evicted_until
+        if start_time < complete_since:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if ring is None:
+            return []
+        if end_time is None:
+            return [text for _message_id, timestamp, text in ring.entries if timestamp >= start_time]
+        return [text for _message_id, timestamp, text in ring.entries if start_time <= timestamp < end_time]
+
+    def _drop_oldest(self, ring):
+        _message_id, timestamp, text = ring.entries.popleft()
+        ring.chars -= len(text)
+        self.total_chars -= len(text)
+        ring.complete_since = max(ring.complete_since, timestamp + 1)
+
+    def _evict(self, chat_id):
+        ring = self._chats.pop(chat_id)
+        self.total_chars -= ring.chars
+        newest = ring.entries[-1][1] + 1 if ring.entries else ring.complete_since
+        self.evicted_until = max(self.evicted_until, ring.complete_since, newest)
+
+
+recent_messages = MessageBuffer()
@@ -1,27 +1,187 @@
 """
-Module to store incoming messages in a SQLite database and purge old messages.
+Module to store incoming messages in hourly-bucketed SQLite tables and purge old messages.
 """
+import atexit
+import queue
 import sqlite3
+import threading
 import time
+from db import DB_FILE, connect, transaction, run_in_db_thread, close_db
 
-DB_FILE = "messages.db"
+BUCKET_SECONDS = 3600  # one table per hour of messages
+RETENTION_SECONDS = 86400  # keep 24 hours of history
 
-def init_db():
+# Flush the write queue once this many messages are waiting...
+WRITE_BATCH_SIZE = 200
+# ...or once the oldest queued message has waited this many seconds.
+WRITE_FLUSH_INTERVAL = 1.0
+
+UPSERT_CHAT = '''
+    INSERT INTO chats (chat_id, last_seen) VALUES (?, ?)
+    ON CONFLICT(chat_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)
+'''
+
+# One full-text index over every bucket (rowid = message id), so bm25 scores are comparable
+FTS_TABLE = "messages_fts"
+# Markers wrapped around matched terms in search snippets
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+
+_STOP = object()
+
+
+def _fts5_available():
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE probe USING fts5(body)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+FTS_ENABLED = _fts5_available()
+
+
+def bucket_for(timestamp):
+    """Return the bucket number a timestamp falls into."""
+    return int(timestamp) // BUCKET_SECONDS
+
+
+def _bucket_table(bucket):
+    return f"messages_{int(bucket)}"
+
+
+def _ensure_fts(conn, bucket):
+    """Keep a bucket's rows in the shared full-text index through triggers, backfilling existing rows."""
+    table = _bucket_table(bucket)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f"{table}_fts_ai",)
+    ).fetchone()
+    if exists:
+        return
+    # Older versions kept one external-content index per bucket
+    conn.execute(f"DROP TABLE IF EXISTS messages_fts_{int(bucket)}")
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, message, chat_id, user_id, timestamp)
+            VALUES (new.id, new.message, new.chat_id, new.user_id, new.timestamp);
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER {table}_fts_au AFTER UPDATE ON {table} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, message, chat_id, user_id, timestamp)
+            VALUES (new.id, new.message, new.chat_id, new.user_id, new.timestamp);
+        END
+    ''')
+    conn.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, message, chat_id, user_id, timestamp) "
+        f"SELECT id, message, chat_id, user_id, timestamp FROM {table}"
+    )
+
+
+def ensure_bucket(conn, bucket):
+    """Create the table, index and full-text sync triggers for a bucket if they do not exist yet."""
+    table = _bucket_table(bucket)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER,
+            user_id INTEGER,
+            message TEXT,
+            timestamp INTEGER
+        )
+    ''')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_chat_ts ON {table} (chat_id, timestamp)")
+    if FTS_ENABLED:
+        _ensure_fts(conn, bucket)
+    conn.execute("INSERT OR IGNORE INTO message_buckets (bucket) VALUES (?)", (bucket,))
+
+
+def list_buckets(conn, first=None, last=None):
+    """Return the existing bucket numbers in ascending order, optionally limited to [first, last]."""
+    query = "SELECT bucket FROM message_buckets WHERE bucket >= ? AND bucket <= ? ORDER BY bucket"
+    lower = first if first is not None else -1
+    upper = last if last is not None else 2 ** 62
+    return [row[0] for row in conn.execute(query, (lower, upper))]
+
+
+def insert_rows(conn, rows):
+    """Insert (id, chat_id, user_id, message, timestamp) rows into their buckets (no commit)."""
+    by_bucket = {}
+    latest = {}
+    for row in rows:
+        by_bucket.setdefault(bucket_for(row[4]), []).append(row)
+        latest[row[1]] = max(latest.get(row[1], 0), row[4])
+
+    for bucket, bucket_rows in by_bucket.items():
+        ensure_bucket(conn, bucket)
+        conn.executemany(
+            f"INSERT INTO {_bucket_table(bucket)} (id, chat_id, user_id, message, timestamp) VALUES (?, ?, ?, ?, ?)",
+            bucket_rows
+        )
+    conn.executemany(UPSERT_CHAT, latest.items())
+    conn.execute(
+        "INSERT OR REPLACE INTO message_meta (key, value) VALUES ('last_id', ?)",
+        (max(row[0] for row in rows),)
+    )
+
+
+def _migrate_legacy_table(conn):
+    """Move rows from the old unpartitioned `messages` table into buckets."""
+    legacy = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'"
+    ).fetchone()
+    if not legacy:
+        return
+    rows = conn.execute("SELECT id, chat_id, user_id, message, timestamp FROM messages").fetchall()
+    if rows:
+        insert_rows(conn, rows)
+    conn.execute("DROP TABLE messages")
+    print(f"[DB] Migrated {len(rows)} messages into hourly buckets.")
+
+
+def init_db(db_file=DB_FILE):
     """Initialize the database."""
+    conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = connect(db_file)
         cursor = conn.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS message_buckets (bucket INTEGER PRIMARY KEY)")
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CREATE TABLE IF NOT EXISTS chats (
+                chat_id INTEGER PRIMARY KEY,
+                last_seen INTEGER
+            )
+        ''')
+        cursor.execute("CREATE TABLE IF NOT EXISTS message_meta (key TEXT PRIMARY KEY, value INTEGER)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_partials (
                 chat_id INTEGER,
-                user_id INTEGER,
-                message TEXT,
-                timestamp INTEGER
+                hour INTEGER,
+                summary TEXT,
+                message_count INTEGER,
+                PRIMARY KEY (chat_id, hour)
             )
         ''')
+        if FTS_ENABLED:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(message, chat_id UNINDEXED, "
+                "user_id UNINDEXED, timestamp UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+            )
+        _migrate_legacy_table(conn)
+        for bucket in list_buckets(conn):
+            ensure_bucket(conn, bucket)  # backfill indexes for buckets written by older versions
         conn.commit()
-        conn.close()
         print("✅ Database initialized!")
 
     except sqlite3.OperationalError as e:
@@ -32,49 +192,366 @@ def init_db():
         if conn:
             conn.close()
 
-def store_message(chat_id, user_id, message):
-    """Store incoming messages in the database."""
-    timestamp = int(time.time())
 
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO messages (chat_id, user_id, message, timestamp) VALUES (?, ?, ?, ?)",
-            (chat_id, user_id, message, timestamp)
+def read_last_id(conn):
+    """Return the highest message id ever assigned (0 for an empty database)."""
+    row = conn.execute("SELECT value FROM message_meta WHERE key = 'last_id'").fetchone()
+    return row[0] if row else 0
+
+
+def read_range(conn, chat_id, start_time, end_time=None):
+    """
+    Return (id, user_id, message, timestamp) rows for a chat in [start_time, end_time),
+    oldest first. Only buckets overlapping the range are queried, each through its
+    (chat_id, timestamp) index.
+    """
+    last = bucket_for(end_time - 1) if end_time is not None else None
+    rows = []
+    with transaction(conn):  # one snapshot, so a concurrent purge cannot drop a listed bucket
+        for bucket in list_buckets(conn, bucket_for(start_time), last):
+            query = f"SELECT id, user_id, message, timestamp FROM {_bucket_table(bucket)} WHERE chat_id = ? AND timestamp >= ?"
+            params = [chat_id, start_time]
+            if end_time is not None:
+                query += " AND timestamp < ?"
+                params.append(end_time)
+            rows.extend(conn.execute(query + " ORDER BY timestamp, id", params).fetchall())
+    return rows
+
+
+def read_ranges(conn, chat_id, ranges):
+    """Return a chat's rows (as read_range) in each (start_time, end_time) range, oldest first, from one snapshot."""
+    with transaction(conn):
+        return [row for start_time, end_time in ranges for row in read_range(conn, chat_id, start_time, end_time)]
+
+
+def read_windows(conn, start_time):
+    """
+    Return {chat_id: [(timestamp, message), ...]} for every chat since start_time,
+    oldest first, reading each overlapping bucket once for all chats.
+    """
+    windows = {}
+    with transaction(conn):
+        for bucket in list_buckets(conn, bucket_for(start_time)):
+            for chat_id, timestamp, message in conn.execute(
+                f"SELECT chat_id, timestamp, message FROM {_bucket_table(bucket)} "
+                "WHERE timestamp >= ? ORDER BY chat_id, timestamp, id",
+                (start_time,)
+            ):
+                windows.setdefault(chat_id, []).append((timestamp, message))
+    return windows
+
+
+def read_chat_ids(conn, since):
+    """Return the ids of chats with at least one message at or after `since`."""
+    return [row[0] for row in conn.execute("SELECT chat_id FROM chats WHERE last_seen >= ?", (since,))]
+
+
+def build_match_query(terms):
+    """
+    Turn free-form user input into a safe FTS5 query: every word becomes a quoted
+    phrase (a trailing * keeps prefix matching) and all words must match.
+    """
+    phrases = []
+    for word in terms.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            phrases.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " AND ".join(phrases)
+
+
+def search_rows(conn, chat_id, terms, limit, offset=0):
+    """
+    Return up to `limit` (id, user_id, timestamp, snippet) matches for a chat, best
+    first (newest first among equal bm25 scores), skipping the first `offset`.
+    """
+    match = build_match_query(terms)
+    if not match or not FTS_ENABLED:
+        return []
+    return conn.execute(
+        f"SELECT rowid, user_id, timestamp, snippet({FTS_TABLE}, 0, ?, ?, '…', 16) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH ? AND chat_id = ? ORDER BY rank, rowid DESC LIMIT ? OFFSET ?",
+        (SNIPPET_START, SNIPPET_END, match, chat_id, limit, offset)
+    ).fetchall()
+
+
+def read_last_message_id(conn, chat_id):
+    """Return the id of the chat's newest stored message (0 if it has none), newest bucket first."""
+    with transaction(conn):
+        for bucket in reversed(list_buckets(conn)):
+            row = conn.execute(f"SELECT MAX(id) FROM {_bucket_table(bucket)} WHERE chat_id = ?", (chat_id,)).fetchone()
+            if row[0] is not None:
+                return row[0]
+    return 0
+
+
+def drop_expired_buckets(conn, cutoff_time):
+    """Drop every bucket that lies entirely before cutoff_time. Returns the number dropped."""
+    with transaction(conn, "IMMEDIATE"):
+        expired = list_buckets(conn, last=bucket_for(cutoff_time) - 1)
+        for bucket in expired:
+            if FTS_ENABLED:  # DROP TABLE does not fire the delete triggers
+                conn.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM {_bucket_table(bucket)})")
+            conn.execute(f"DROP TABLE IF EXISTS {_bucket_table(bucket)}")
+            conn.execute("DELETE FROM message_buckets WHERE bucket = ?", (bucket,))
+        conn.execute("DELETE FROM chats WHERE last_seen < ?", (cutoff_time,))
+        conn.execute("DELETE FROM summary_partials WHERE hour < ?", (bucket_for(cutoff_time),))
+    return len(expired)
+
+
+def write_partial(conn, chat_id, hour, summary, message_count):
+    """Persist the summary of one hour (bucket) of a chat."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute(
+            "INSERT OR REPLACE INTO summary_partials (chat_id, hour, summary, message_count) VALUES (?, ?, ?, ?)",
+            (chat_id, hour, summary, message_count)
         )
-        conn.commit()
-        conn.close()
 
-        print(f"✅ [DB] Stored message: Chat={chat_id}, User={user_id}, Message={message}")
 
-    except sqlite3.OperationalError as e:
-        print(f"[ERROR] Database operation failed: {e}")
-    except sqlite3.IntegrityError as e:
-        print(f"[ERROR] Data integrity issue: {e}")
-    except sqlite3.DatabaseError as e:
-        print(f"[ERROR] General database error: {e}")
-    finally:
-        if conn:
+def read_all_partials(conn, first_hour, last_hour):
+    """Return {chat_id: {hour: summary}} for every stored partial in [first_hour, last_hour]."""
+    partials = {}
+    for chat_id, hour, summary in conn.execute(
+        "SELECT chat_id, hour, summary FROM summary_partials WHERE hour BETWEEN ? AND ?",
+        (first_hour, last_hour)
+    ):
+        partials.setdefault(chat_id, {})[hour] = summary
+    return partials
+
+
+def read_partials(conn, chat_id, first_hour, last_hour):
+    """Return {hour: summary} for the stored partials of a chat in [first_hour, last_hour]."""
+    return dict(conn.execute(
+        "SELECT hour, summary FROM summary_partials WHERE chat_id = ? AND hour BETWEEN ? AND ?",
+        (chat_id, first_hour, last_hour)
+    ).fetchall())
+
+
+class MessageWriter:
+    """
+    Write-behind queue for incoming messages.
+
+    Callers only append to an in-memory queue. A dedicated thread owns the SQLite
+    connection and commits the queue in one transaction whenever `batch_size`
+    messages are waiting or `flush_interval` seconds have passed since the first
+    unflushed message arrived. Message ids are assigned at enqueue time so they
+    stay unique across bucket tables.
+    """
+
+    def __init__(self, db_file=DB_FILE, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_id = None
+        self.last_ids = {}  # chat_id -> id of the newest message queued by this process
+
+    def start(self):
+        """Start the writer thread if it is not already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            if self._last_id is None:
+                conn = connect(self.db_file)
+                try:
+                    self._last_id = read_last_id(conn)
+                finally:
+                    conn.close()
+            self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, chat_id, user_id, message, timestamp):
+        """Queue a message for the next batched insert and return its id."""
+        self.start()
+        with self._lock:
+            self._last_id += 1
+            message_id = self._last_id
+            self.last_ids[chat_id] = message_id
+        self._queue.put((message_id, chat_id, user_id, message, timestamp))
+        return message_id
+
+    def flush(self, timeout=None):
+        """Block until every message queued so far has been committed."""
+        if not (self._thread and self._thread.is_alive()):
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """Flush whatever is still queued and stop the writer thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self):
+        conn = connect(self.db_file)
+        batch = []
+        waiters = []
+        deadline = None
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if batch else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None  # flush interval elapsed
+
+                if item is _STOP:
+                    self._commit(conn, batch)
+                    for waiter in waiters:
+                        waiter.set()
+                    return
+
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item is not None:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(item)
+
+                if item is None or waiters or len(batch) >= self.batch_size:
+                    self._commit(conn, batch)
+                    batch = []
+                    for waiter in waiters:
+                        waiter.set()
+                    waiters = []
+        finally:
             conn.close()
 
+    @staticmethod
+    def _commit(conn, batch):
+        if not batch:
+            return
+        try:
+            with transaction(conn, "IMMEDIATE"):
+                insert_rows(conn, batch)
+            print(f"[DB] Flushed {len(batch)} messages.")
+        except sqlite3.IntegrityError as e:
+            print(f"[ERROR] Data integrity issue: {e}")
+        except sqlite3.OperationalError as e:
+            print(f"[ERROR] Database operation failed: {e}")
+        except sqlite3.DatabaseError as e:
+            print(f"[ERROR] General database error: {e}")
+
+
+_writer = MessageWriter()
+atexit.register(_writer.close)
+
+
+def store_message(chat_id, user_id, message, timestamp=None):
+    """Queue an incoming message for storage in the database and return its id."""
+    if timestamp is None:
+        timestamp = int(time.time())
+    message_id = _writer.enqueue(chat_id, user_id, message, timestamp)
+    print(f"✅ [DB] Queued message: Chat={chat_id}, User={user_id}, Message={message}")
+    return message_id
+
+
+def flush_messages(timeout=None):
+    """Wait until every queued message is visible to readers."""
+    _writer.flush(timeout)
+
+
+def _flush_and_read_range(conn, chat_id, start_time, end_time):
+    _writer.flush(timeout=5)
+    return read_range(conn, chat_id, start_time, end_time)
+
+
+async def store(chat_id, user_id, message, timestamp=None):
+    """Queue a message for the batched writer and return its id (never touches SQLite on the loop)."""
+    return store_message(chat_id, user_id, message, timestamp)
+
+
+async def fetch_range(chat_id, start_time, end_time=None):
+    """Await (id, user_id, message, timestamp) rows for a chat, including messages still queued."""
+    return await run_in_db_thread(_flush_and_read_range, chat_id, start_time, end_time)
+
+
+def _flush_and_read_ranges(conn, chat_id, ranges):
+    _writer.flush(timeout=5)
+    return read_ranges(conn, chat_id, ranges)
+
+
+async def fetch_ranges(chat_id, ranges):
+    """Await a chat's rows in several (start_time, end_time) ranges, including messages still queued."""
+    return await run_in_db_thread(_flush_and_read_ranges, chat_id, ranges)
+
+
+def _flush_and_read_windows(conn, start_time):
+    _writer.flush(timeout=5)
+    return read_windows(conn, start_time)
+
+
+async def fetch_windows(start_time):
+    """Await every chat's (timestamp, message) rows since start_time in one pass over the buckets."""
+    return await run_in_db_thread(_flush_and_read_windows, start_time)
+
+
+async def distinct_chats(since):
+    """Await the ids of chats that have messages at or after `since`."""
+    return await run_in_db_thread(read_chat_ids, since)
+
+
+def _flush_and_search(conn, chat_id, terms, limit, offset):
+    _writer.flush(timeout=5)
+    return search_rows(conn, chat_id, terms, limit, offset)
+
+
+async def search(chat_id, terms, limit, offset=0):
+    """Await ranked full-text matches for a chat, including messages still queued (see search_rows)."""
+    return await run_in_db_thread(_flush_and_search, chat_id, terms, limit, offset)
+
+
+async def save_partial(chat_id, hour, summary, message_count):
+    """Await persisting an hourly partial summary."""
+    await run_in_db_thread(write_partial, chat_id, hour, summary, message_count)
+
+
+async def fetch_partials(chat_id, first_hour, last_hour):
+    """Await {hour: summary} for a chat's stored hourly partials."""
+    return await run_in_db_thread(read_partials, chat_id, first_hour, last_hour)
+
+
+async def fetch_all_partials(first_hour, last_hour):
+    """Await {chat_id: {hour: summary}} for all chats' hourly partials in the range."""
+    return await run_in_db_thread(read_all_partials, first_hour, last_hour)
+
+
+async def last_message_id(chat_id):
+    """Await the id of the chat's newest message: the high-water mark for caching derived results."""
+    message_id = _writer.last_ids.get(chat_id)
+    if message_id is not None:
+        return message_id
+    return await run_in_db_thread(read_last_message_id, chat_id)
+
+
+async def purge(cutoff_time=None):
+    """Await the removal of buckets older than the retention window. Returns the number dropped."""
+    if cutoff_time is None:
+        cutoff_time = int(time.time()) - RETENTION_SECONDS
+    return await run_in_db_thread(drop_expired_buckets, cutoff_time)
+
+
+async def close_message_store(_application=None):
+    """Flush pending writes and stop the writer (used as the Application post_shutdown hook)."""
+    _writer.close()
+    await close_db()
+    print("[DB] Message writer flushed and closed.")
+
+
 async def purge_old_messages(_):
-    """Delete messages older than 24 hours."""
-    cutoff_time = int(time.time()) - 86400  # 24 hours ago
+    """Drop the hourly buckets that are entirely older than the retention window."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM messages WHERE timestamp < ?", (cutoff_time,))
-        conn.commit()
-        print("[DEBUG] Old messages purged.")
+        dropped = await purge()
+        print(f"[DEBUG] Old messages purged ({dropped} buckets dropped).")
 
     except sqlite3.OperationalError as e:
         print(f"[ERROR] Database operation failed: {e}")
     except sqlite3.DatabaseError as e:
         print(f"[ERROR] General database error: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-init_db()
-print("[DB] Initialized database and ensured messages table exists.")
@@ -0,0 +1,64 @@
+"""
+Module for the /netstats command: counters of the upstream call coalescing and caching layers
+and the state of each upstream host's circuit breaker.
+"""
+
+from telegram import Update
+from telegram.ext import CommandHandler, CallbackContext
+from telegram.error import TelegramError
+from singleflight import upstream_flights
+from response_cache import response_cache
+from media_cache import media_cache
+from geocode import geocoder
+from weather_station import station_poller
+from imdb import omdb_quota
+from circuit_breaker import breaker_states, CLOSED
+
+
+def format_stats() -> str:
+    """Build the /netstats report."""
+    lines = ["📡 Upstream calls (requested / coalesced into another in-flight call):"]
+    flights = upstream_flights.stats()
+    for namespace, (calls, coalesced) in flights.items():
+        lines.append(f"• {namespace}: {calls} / {coalesced}")
+    if not flights:
+        lines.append("• none yet")
+    total_calls = sum(calls for calls, _coalesced in flights.values())
+    total_coalesced = sum(coalesced for _calls, coalesced in flights.values())
+    lines.append(f"Total: {total_calls} calls, {total_coalesced} coalesced")
+    lines.append("")
+    lines.append(
+        f"🗄 Response cache: {response_cache.hits} fresh hits, {response_cache.stale_hits} stale hits, "
+        f"{response_cache.misses} misses, {response_cache.expired_hits} expired entries served on errors"
+    )
+    lines.append(
+        f"📍 Geocoding: {geocoder.index_hits} postcode index hits, {geocoder.hits} cached, {geocoder.misses} looked up"
+    )
+    lines.append(
+        f"🌦 Saltney station polls: {station_poller.updates} downloaded, {station_poller.not_modified} not modified"
+    )
+    lines.append(f"🎬 OMDB requests today: {omdb_quota.used} of {omdb_quota.daily_limit}")
+    lines.append(f"🖼 Media file_ids: {media_cache.hits} reused, {media_cache.misses} uploaded")
+    lines.append("")
+    lines.append("🔌 Upstream hosts (circuit state, consecutive failures, calls rejected):")
+    for host, (state, failures, rejected) in breaker_states().items():
+        marker = "🟢" if state == CLOSED else "🔴"
+        lines.append(f"{marker} {host}: {state}, {failures}, {rejected}")
+    return "\n".join(lines)
+
+
+async def netstats_command(update: Update, _context: CallbackContext) -> None:
+    """Handle the Telegram /netstats command."""
+    print(f"Received /netstats command from user {update.message.from_user.id}")
+    try:
+        await update.message.reply_text(format_stats())
+    except TelegramError as e:
+        print(f"[ERROR] Telegram API error: {e}")
+
+
+def register_netstats_handler(app) -> None:
+    """
+    Register the /netstats command handler with the Telegram application.
+    """
+    print("Registering /netstats command handler")
+    app.add_handler(CommandHandler("netstats", netstats_command))
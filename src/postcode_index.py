@@ -0,0 +1,92 @@
+"""
+Module resolving UK outward postcodes (the "CH4" of "CH4 8AB") to centroid coordinates offline.
+"""
+
+import mmap
+import os
+import re
+import struct
+
+INDEX_FILE = os.getenv(
+    "POSTCODE_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "uk_outcodes.bin")
+)
+MAGIC = b"UKOC"
+HEADER = struct.Struct("<4sI")  # magic, record count
+RECORD = struct.Struct("<4sff")  # outward code, latitude, longitude
+CODE_WIDTH = 4
+
+# Outward code, optionally followed by the inward code (digit + two letters)
+POSTCODE_PATTERN = re.compile(r"^([A-Z]{1,2}[0-9][A-Z0-9]?) ?([0-9][A-Z]{2})?$")
+
+
+def outward_code(text):
+    """Return the outward code of a UK postcode or outward code ("ch4 8ab" -> "CH4"), or None."""
+    match = POSTCODE_PATTERN.match(" ".join(text.upper().split()))
+    return match.group(1) if match else None
+
+
+def write_index(path, centroids):
+    """Write an index file from {outward code: (latitude, longitude)}."""
+    records = sorted(
+        (code.upper().ljust(CODE_WIDTH).encode("ascii"), lat, lon) for code, (lat, lon) in centroids.items()
+    )
+    with open(path + ".tmp", "wb") as index:
+        index.write(HEADER.pack(MAGIC, len(records)))
+        for record in records:
+            index.write(RECORD.pack(*record))
+    os.replace(path + ".tmp", path)
+
+
+class PostcodeIndex:
+    """Read-only view over a memory-mapped outward-code index."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self._map = None
+        self._count = 0
+        self._opened = False
+
+    def _open(self):
+        self._opened = True
+        try:
+            with open(self.path, "rb") as index:
+                mapped = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Postcode index unavailable ({e}); postcodes will be geocoded online.")
+            return
+        magic, count = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or len(mapped) != HEADER.size + count * RECORD.size:
+            print(f"[ERROR] {self.path} is not a valid postcode index; postcodes will be geocoded online.")
+            mapped.close()
+            return
+        self._map, self._count = mapped, count
+        print(f"[DEBUG] Mapped postcode index with {count} outward codes.")
+
+    def __len__(self):
+        if not self._opened:
+            self._open()
+        return self._count
+
+    def lookup(self, code):
+        """Return (latitude, longitude) of an outward code's centroid, or None if it is not indexed."""
+        if not self._opened:
+            self._open()
+        if self._map is None or not code or len(code) > CODE_WIDTH:
+            return None
+        target = code.upper().ljust(CODE_WIDTH).encode("ascii")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            found = self._map[offset:offset + CODE_WIDTH]
+            if found < target:
+                low = middle + 1
+            elif found > target:
+                high = middle
+            else:
+                _code, latitude, longitude = RECORD.unpack_from(self._map, offset)
+                return round(latitude, 5), round(longitude, 5)
+        return None
+
+
+postcode_index = PostcodeIndex()
@@ -2,10 +2,12 @@
 Module for handling insult commands using the Evil Insult API.
 """
 
-import requests
+import httpx
 from telegram.ext import CommandHandler
+from http_client import get
+from latency_budget import with_latency_budget
 
-def fetch_insult() -> str:
+async def fetch_insult() -> str:
     """
     Fetch an insult from the Evil Insult API.
 
@@ -13,14 +15,15 @@ def fetch_insult() -> str:
     """
     url = "https://evilinsult.com/generate_insult.php?lang=en&type=text"
     try:
-        response = requests.get(url, timeout=10)
+        response = await get(url)
         if response.status_code == 200:
             return response.text.strip()
         return "I ran out of insults, but just imagine something mean!"
-    except requests.RequestException as exc:
+    except httpx.HTTPError as exc:
         print("Error retrieving insult, please try again later: %s", exc)
-        return None
+        return "I ran out of insults, but just imagine something mean!"
 
+@with_latency_budget()
 async def insult_command(update, context):
     """
     Handle the /insult command by fetching an insult and sending it to the chat.
@@ -36,7 +39,7 @@ async def insult_command(update, context):
         return
 
     user_to_insult = " ".join(context.args)
-    insult = fetch_insult()
+    insult = await fetch_insult()
     message = f"Hey {user_to_insult}, {insult[:1].lower() + insult[1:]}"
     await context.bot.send_message(chat_id=update.message.chat_id, text=message)
 
@@ -0,0 +1,235 @@
+"""
+Module caching upstream API responses (OMDB, Open-Meteo forecasts, exchange rates) with stale-while-revalidate.
+"""
+
+import asyncio
+from collections import OrderedDict
+import json
+import os
+import sqlite3
+import time
+import httpx
+from http_client import get, json_or_none
+from response_store import fetch_cached_responses, save_cached_response, forget_cached_responses
+from singleflight import upstream_flights
+from latency_budget import clear_budget
+
+# endpoint -> (seconds served fresh, further seconds served stale while refreshing)
+ENDPOINT_TTLS = {
+    "omdb_search": (86400, 6 * 86400),
+    "omdb_title": (7 * 86400, 23 * 86400),  # ratings move slowly; spare the OMDB daily quota
+    "forecast": (900, 1800),  # Open-Meteo publishes current conditions every 15 minutes
+    "gbp_brl": (300, 3300),
+}
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+MAX_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+# Keep entries in messages.db across restarts (RESPONSE_CACHE_PERSIST=0 keeps them in memory only)
+PERSIST = os.getenv("RESPONSE_CACHE_PERSIST", "1") == "1"
+
+
+class ResponseCache:
+    """Per-endpoint TTL cache with stale-while-revalidate, LRU eviction and optional persistence."""
+
+    def __init__(self, ttls=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, persist=PERSIST):
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expired_hits = 0
+        self._entries = OrderedDict()  # cache key -> (fresh_until, stale_until, value, size)
+        self._bytes = 0
+        self._loaded = not persist
+        self._load_lock = None  # created on first use, inside the running loop
+        self._refreshing = set()
+        self._tasks = set()  # background refreshes and disk writes, referenced until done
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(self):
+        """Fill the memory cache from disk on first use; concurrent first lookups wait for the one load."""
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                rows = await fetch_cached_responses(time.time(), self.max_entries)
+                for cache_key, value, fresh_until, stale_until in rows:
+                    self._put(cache_key, json.loads(value), fresh_until, stale_until, len(value), persist=False)
+                print(f"[DEBUG] Loaded {len(self._entries)} cached API responses from disk.")
+            except (sqlite3.DatabaseError, ValueError) as e:
+                print(f"[ERROR] Could not load the response cache: {e}")
+            self._loaded = True
+
+    def _put(self, cache_key, value, fresh_until, stale_until, size=None, persist=True):
+        encoded = json.dumps(value) if size is None or persist else None
+        size = len(encoded) if size is None else size
+        old = self._entries.pop(cache_key, None)
+        if old is not None:
+            self._bytes -= old[3]
+        self._entries[cache_key] = (fresh_until, stale_until, value, size)
+        self._bytes += size
+
+        evicted = []
+        while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+            evicted_key, evicted_entry = self._entries.popitem(last=False)
+            self._bytes -= evicted_entry[3]
+            evicted.append(evicted_key)
+
+        if self.persist and persist:
+            self._spawn(save_cached_response(cache_key, encoded, fresh_until, stale_until))
+        if self.persist and evicted:
+            self._spawn(forget_cached_responses(evicted))
+
+    async def _fetch_and_store(self, endpoint, cache_key, fetch, cacheable):
+        value = await upstream_flights.do(endpoint, cache_key, fetch)
+        if cacheable is None or cacheable(value):
+            fresh, stale = self.ttls[endpoint]
+            now = time.time()
+            self._put(cache_key, value, now + fresh, now + fresh + stale)
+        return value
+
+    async def _refresh(self, endpoint, cache_key, fetch, cacheable):
+        clear_budget()  # the refresh runs on its own, not within the command that triggered it
+        try:
+            await self._fetch_and_store(endpoint, cache_key, fetch, cacheable)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"[ERROR] Background refresh of {cache_key} failed, keeping the stale entry: {e!r}")
+        finally:
+            self._refreshing.discard(cache_key)
+
+    def peek(self, endpoint, key):
+        """Return the cached response for (endpoint, key) while it may still be served, without fetching."""
+        entry = self._entries.get(f"{endpoint}:{key}")
+        return entry[2] if entry is not None and time.time() < entry[1] else None
+
+    async def _fetch_many_and_store(self, endpoint, keys, fetch_many, cacheable):
+        values = await upstream_flights.do(endpoint, tuple(keys), lambda: fetch_many(keys))
+        fresh, stale = self.ttls[endpoint]
+        now = time.time()
+        for key, value in zip(keys, values):
+            if cacheable is None or cacheable(value):
+                self._put(f"{endpoint}:{key}", value, now + fresh, now + fresh + stale)
+        return values
+
+    async def _refresh_many(self, endpoint, keys, fetch_many, cacheable):
+        clear_budget()
+        try:
+            await self._fetch_many_and_store(endpoint, keys, fetch_many, cacheable)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"[ERROR] Background refresh of {len(keys)} {endpoint} entries failed, keeping them stale: {e!r}")
+        finally:
+            self._refreshing.difference_update(f"{endpoint}:{key}" for key in keys)
+
+    async def prefetch_many(self, endpoint, keys, fetch_many, cacheable=None):
+        """Fetch several keys of an endpoint now with one fetch_many(keys) call and store them as fresh."""
+        if not self._loaded:
+            await self._load()
+        return await self._fetch_many_and_store(endpoint, list(keys), fetch_many, cacheable)
+
+    async def get_many_or_fetch(self, endpoint, keys, fetch_many, cacheable=None):
+        """
+        Return the responses for several keys of an endpoint, in order, like get_or_fetch; every
+        missing one is fetched by a single fetch_many call (e.g. one multi-location API request).
+
+        :param fetch_many: Coroutine function taking a list of keys and returning their responses in order.
+        :return: One response per key; when the upstream fails, expired entries are served and
+            None is returned for keys with none (the error is raised if no key has one).
+        """
+        if not self._loaded:
+            await self._load()
+
+        now = time.time()
+        values, expired, missing, stale = {}, {}, [], []
+        for key in dict.fromkeys(keys):
+            cache_key = f"{endpoint}:{key}"
+            entry = self._entries.get(cache_key)
+            if entry is not None and now < entry[1]:
+                self._entries.move_to_end(cache_key)
+                values[key] = entry[2]
+                if now < entry[0]:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if cache_key not in self._refreshing:
+                        stale.append(key)
+                continue
+            self.misses += 1
+            missing.append(key)
+            if entry is not None:
+                expired[key] = entry[2]
+
+        if missing:
+            batch = missing + stale  # the request is made anyway, so it refreshes the stale entries too
+            try:
+                values.update(zip(batch, await self._fetch_many_and_store(endpoint, batch, fetch_many, cacheable)))
+            except httpx.HTTPError as e:
+                if not expired:
+                    raise
+                print(f"[ERROR] Fetching {len(batch)} {endpoint} entries failed ({e!r}); serving expired responses.")
+                self.expired_hits += len(expired)
+                values.update(expired)
+        elif stale:
+            self._refreshing.update(f"{endpoint}:{key}" for key in stale)
+            self._spawn(self._refresh_many(endpoint, stale, fetch_many, cacheable))
+        return [values.get(key) for key in keys]
+
+    async def get_or_fetch(self, endpoint, key, fetch, cacheable=None):
+        """
+        Return the cached response for (endpoint, key), or await fetch() for it.
+
+        :param endpoint: Name in ENDPOINT_TTLS; selects the TTL and stale window.
+        :param key: Normalized request (e.g. the lower-cased search terms), without secrets.
+        :param fetch: Zero-argument coroutine function returning the JSON-serializable response.
+        :param cacheable: Optional predicate; responses it rejects (errors, empty results) are not stored.
+        """
+        if not self._loaded:
+            await self._load()
+
+        cache_key = f"{endpoint}:{key}"
+        entry = self._entries.get(cache_key)
+        now = time.time()
+        if entry is not None:
+            fresh_until, stale_until, value, _size = entry
+            if now < fresh_until:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return value
+            if now < stale_until:
+                self._entries.move_to_end(cache_key)
+                self.stale_hits += 1
+                if cache_key not in self._refreshing:
+                    self._refreshing.add(cache_key)
+                    self._spawn(self._refresh(endpoint, cache_key, fetch, cacheable))
+                return value
+
+        self.misses += 1
+        try:
+            return await self._fetch_and_store(endpoint, cache_key, fetch, cacheable)
+        except httpx.HTTPError as e:
+            if entry is None:
+                raise
+            print(f"[ERROR] Fetching {cache_key} failed ({e!r}); serving the expired cached response.")
+            self.expired_hits += 1
+            return entry[2]
+
+
+response_cache = ResponseCache()
+
+
+async def cached_json(endpoint, key, url, params=None, headers=None, cacheable=bool):
+    """
+    GET url and return its JSON payload (None for a non-200 response) through the
+    response cache. By default only non-empty payloads are cached.
+    """
+    async def fetch():
+        response = await get(url, params=params, headers=headers)
+        return json_or_none(response)
+
+    return await response_cache.get_or_fetch(endpoint, key, fetch, cacheable=cacheable)
@@ -0,0 +1,57 @@
+"""
+Module persisting cached upstream API responses so the response cache survives restarts.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS response_cache (
+        cache_key TEXT PRIMARY KEY,
+        value TEXT,
+        fresh_until REAL,
+        stale_until REAL
+    )
+'''
+
+
+def read_cached_responses(conn, now, limit):
+    """Drop expired cached API responses and return up to `limit` live ones, least recently fetched first."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute("DELETE FROM response_cache WHERE stale_until < ?", (now,))
+    return conn.execute(
+        "SELECT * FROM (SELECT cache_key, value, fresh_until, stale_until FROM response_cache "
+        "ORDER BY fresh_until DESC LIMIT ?) ORDER BY fresh_until",
+        (limit,)
+    ).fetchall()
+
+
+def write_cached_response(conn, cache_key, value, fresh_until, stale_until):
+    """Persist one cached API response (value is JSON text)."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (cache_key, value, fresh_until, stale_until) VALUES (?, ?, ?, ?)",
+            (cache_key, value, fresh_until, stale_until)
+        )
+
+
+def delete_cached_responses(conn, cache_keys):
+    """Delete cached API responses evicted from memory."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.executemany("DELETE FROM response_cache WHERE cache_key = ?", [(key,) for key in cache_keys])
+
+
+async def fetch_cached_responses(now, limit):
+    """Await the live persisted API responses (see read_cached_responses)."""
+    return await run_in_db_thread(read_cached_responses, now, limit)
+
+
+async def save_cached_response(cache_key, value, fresh_until, stale_until):
+    """Await persisting a cached API response."""
+    await run_in_db_thread(write_cached_response, cache_key, value, fresh_until, stale_until)
+
+
+async def forget_cached_responses(cache_keys):
+    """Await deleting evicted cached API responses."""
+    await run_in_db_thread(delete_cached_responses, cache_keys)
+
+
+register_schema(SCHEMA)
@@ -0,0 +1,98 @@
+"""
+Module for the /search command: ranked, paginated full-text search over the chat's stored messages.
+"""
+
+from datetime import datetime
+import html
+import sqlite3
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import CommandHandler, CallbackContext, CallbackQueryHandler
+from telegram.error import TelegramError
+from message_store import search, SNIPPET_START, SNIPPET_END
+
+PAGE_SIZE = 5
+MAX_REMEMBERED_SEARCHES = 20  # per chat, for the Prev/Next buttons
+
+
+async def render_page(chat_id: int, terms: str, page: int):
+    """
+    Build the text and keyboard for one page of search results.
+
+    :return: (html_text, reply_markup or None)
+    """
+    # Ask for one extra hit so we know whether a next page exists
+    hits = await search(chat_id, terms, PAGE_SIZE + 1, page * PAGE_SIZE)
+    has_next = len(hits) > PAGE_SIZE
+    hits = hits[:PAGE_SIZE]
+
+    if not hits:
+        text = "No more results." if page else f"🔍 No messages found for <b>{html.escape(terms)}</b>."
+    else:
+        lines = [f"🔍 Results for <b>{html.escape(terms)}</b> (page {page + 1}):", ""]
+        for position, (_message_id, _user_id, timestamp, snippet) in enumerate(hits, start=page * PAGE_SIZE + 1):
+            when = datetime.fromtimestamp(timestamp).strftime("%d/%m %H:%M")
+            snippet = html.escape(snippet).replace(SNIPPET_START, "<b>").replace(SNIPPET_END, "</b>")
+            lines.append(f"{position}. [{when}] {snippet}")
+        text = "\n".join(lines)
+
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("◀ Prev", callback_data=f"search_{page - 1}"))
+    if has_next:
+        buttons.append(InlineKeyboardButton("Next ▶", callback_data=f"search_{page + 1}"))
+    return text, InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def search_command(update: Update, context: CallbackContext) -> None:
+    """Handle the Telegram /search command."""
+    print(f"Received /search command from user {update.message.from_user.id}")
+    if not context.args:
+        await update.message.reply_text("Usage: /search <terms>")
+        return
+
+    terms = " ".join(context.args)
+    chat_id = update.message.chat_id
+    try:
+        text, reply_markup = await render_page(chat_id, terms, 0)
+        sent = await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+
+        # Remember the terms so the paging buttons on this message can re-run the search
+        searches = context.chat_data.setdefault("searches", {})
+        searches[sent.message_id] = terms
+        while len(searches) > MAX_REMEMBERED_SEARCHES:
+            searches.pop(next(iter(searches)))
+
+    except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+        print(f"[ERROR] Database error: {e}")
+        await update.message.reply_text("❌ Search failed. Please try again later.")
+    except TelegramError as e:
+        print(f"[ERROR] Telegram API error: {e}")
+
+
+async def search_page_callback(update: Update, context: CallbackContext) -> None:
+    """Callback handler for the Prev/Next buttons under a search result."""
+    query = update.callback_query
+    await query.answer()
+
+    terms = context.chat_data.get("searches", {}).get(query.message.message_id)
+    if not terms:
+        await query.edit_message_text("This search has expired. Please run /search again.")
+        return
+
+    page = int(query.data.split("_")[1])
+    try:
+        text, reply_markup = await render_page(query.message.chat_id, terms, page)
+        await query.edit_message_text(text, parse_mode="HTML", reply_markup=reply_markup)
+    except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+        print(f"[ERROR] Database error: {e}")
+    except TelegramError as e:
+        print(f"[ERROR] Telegram API error: {e}")
+
+
+def register_search_handler(app) -> None:
+    """
+    Register the /search command and its paging callback handler with the Telegram application.
+    """
+    print("Registering /search command handler")
+    app.add_handler(CommandHandler("search", search_command))
+    app.add_handler(CallbackQueryHandler(search_page_callback, pattern=r"^search_\d+$"))
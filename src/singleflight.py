@@ -0,0 +1,65 @@
+"""
+Module coalescing concurrent identical upstream calls ("single flight").
+"""
+
+import asyncio
+from collections import Counter
+
+# Handed to the waiters of a call whose caller was cancelled or interrupted, so that one of them retries it
+_LEADER_CANCELLED = object()
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for that key share it."""
+
+    def __init__(self):
+        self.calls = Counter()  # namespace -> calls requested
+        self.coalesced = Counter()  # namespace -> calls that joined one already in flight
+        self._in_flight = {}  # key -> asyncio.Future of the running call
+
+    async def do(self, namespace, key, fetch):
+        """
+        Return await fetch(), unless a call for (namespace, key) is already running,
+        in which case wait for that call's result instead.
+
+        :param key: Normalized request, hashable (e.g. lower-cased terms or a tuple of parameters).
+        :param fetch: Zero-argument coroutine function performing the call.
+        """
+        flight_key = (namespace, key)
+        self.calls[namespace] += 1
+        joined = False
+        while True:
+            pending = self._in_flight.get(flight_key)
+            if pending is None:
+                return await self._lead(flight_key, fetch)
+            if not joined:
+                self.coalesced[namespace] += 1
+                joined = True
+            result = await asyncio.shield(pending)
+            if result is not _LEADER_CANCELLED:
+                return result
+            # The caller that was making the call went away; the first waiter to get here makes it again
+
+    async def _lead(self, flight_key, fetch):
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            return result
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved even when nobody else was waiting
+            raise
+        finally:
+            # Cancelled or interrupted by another BaseException: always release the key and hand the call on
+            if not future.done():
+                future.set_result(_LEADER_CANCELLED)
+            del self._in_flight[flight_key]
+
+    def stats(self):
+        """Return {namespace: (calls, coalesced)}."""
+        return {namespace: (count, self.coalesced[namespace]) for namespace, count in sorted(self.calls.items())}
+
+
+upstream_flights = SingleFlight()
@@ -0,0 +1,35 @@
+"""
+Module storing the history of Saltney weather station snapshots.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS station_readings (observed_at REAL PRIMARY KEY, readings TEXT)"
+
+
+def write_station_reading(conn, observed_at, readings, cutoff_time):
+    """Append a weather station snapshot (readings is JSON text) and drop those older than cutoff_time."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute(
+            "INSERT OR REPLACE INTO station_readings (observed_at, readings) VALUES (?, ?)", (observed_at, readings)
+        )
+        conn.execute("DELETE FROM station_readings WHERE observed_at < ?", (cutoff_time,))
+
+
+def read_station_readings(conn, since):
+    """Return [(observed_at, readings JSON)] of the station snapshots taken since a time, oldest first."""
+    return conn.execute(
+        "SELECT observed_at, readings FROM station_readings WHERE observed_at >= ? ORDER BY observed_at", (since,)
+    ).fetchall()
+
+
+async def save_station_reading(observed_at, readings, cutoff_time):
+    """Await appending a weather station snapshot."""
+    await run_in_db_thread(write_station_reading, observed_at, readings, cutoff_time)
+
+
+async def fetch_station_readings(since):
+    """Await the weather station snapshots taken since a time."""
+    return await run_in_db_thread(read_station_readings, since)
+
+
+register_schema(SCHEMA)
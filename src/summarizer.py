@@ -1,95 +1,189 @@
 """
 This module contains the logic to fetch and summarize messages from the last 24 hours for each chat.
 """
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
 import time
 import sqlite3
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
-import torch
-
-MODEL_NAME = "facebook/bart-large-cnn"
-
-# Detect if GPU is available (MPS for Mac, CUDA for NVIDIA, fallback to CPU)
-DEVICE = "mps" if torch.backends.mps.is_available() else "cpu"
-print(f"[DEBUG] Using device: {DEVICE}")
-
-try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_NAME).to(DEVICE)
-    summarizer = pipeline("summarization", model=model, tokenizer=tokenizer, device=0 if DEVICE != "cpu" else -1)
-    print("[DEBUG] Summarization Model Loaded Successfully!")
-except ConnectionError:
-    print("[ERROR] Failed to connect to Hugging Face. Check your internet.")
-except OSError as e:
-    print(f"[ERROR] Model loading failed (File issue): {e}")
-except ValueError as e:
-    print(f"[ERROR] Model configuration issue: {e}")
-
-def summarize_messages(messages):
-    """Summarizes a list of messages using bart-large-cnn."""
-    if not messages:
-        print("[DEBUG] No messages found for summarization.")
-        return "No messages found in the selected timeframe."
-
-    input_text = " ".join(messages)[:1024]  # ✅ Limit input to avoid errors
-    print(f"[DEBUG] Generating summary for {len(messages)} messages...")
+from telegram.error import TelegramError
+from message_store import fetch_range, fetch_windows, distinct_chats, fetch_partials, fetch_all_partials, save_partial
+from message_store import fetch_ranges, bucket_for, BUCKET_SECONDS
+from message_buffer import recent_messages
+from summary_model import summarize_hour
+from summary_worker import summary_service
+
+# Windows at least this long are composed from the stored hourly partial summaries
+COMPOSE_MIN_SECONDS = 12 * 3600
+# Run the hourly partial job this many seconds after the hour turns
+PARTIAL_JOB_DELAY = 120
+# Daily summaries being sent to Telegram at the same time
+DAILY_SEND_CONCURRENCY = 8
+
+
+async def _read_messages(chat_id, start_time, end_time=None):
+    """Messages in [start_time, end_time), from the ring buffer when it covers the range."""
+    messages = recent_messages.window(chat_id, start_time, end_time)
+    if messages is not None:
+        print(f"[DEBUG] Served {len(messages)} messages for chat {chat_id} from the in-memory buffer.")
+        return messages
 
-    try:
-        response = summarizer(input_text, max_length=100, min_length=20, do_sample=False)
-        summary = response[0]["summary_text"]
-        print(f"[DEBUG] Summary Generated: {summary}")
-        return summary
-    except IndexError:
-        print("[ERROR] Model returned an unexpected empty response.")
-        return "Error: Model failed to generate a summary."
-    except RuntimeError as e:
-        print(f"[ERROR] Runtime error (likely due to memory): {e}")
-        return "Error: Model ran out of memory."
-    except ValueError as e:
-        print(f"[ERROR] Invalid input data: {e}")
-        return "Error: Invalid input for summarization."
-
-def fetch_messages(chat_id, start_time):
-    """Retrieve messages from the last X hours."""
     print(f"[DEBUG] Fetching messages for chat {chat_id} from timestamp {start_time}...")
+    messages = [row[2] for row in await fetch_range(chat_id, start_time, end_time)]
+    print(f"[DEBUG] Retrieved {len(messages)} messages from DB.")
+    return messages
 
-    conn = sqlite3.connect("messages.db")
-    cursor = conn.cursor()
 
+async def fetch_messages(chat_id, start_time, end_time=None):
+    """Retrieve messages from the last X hours, from memory when the ring buffer covers the window."""
+    messages = []
     try:
-        cursor.execute(
-            "SELECT message FROM messages WHERE chat_id = ? AND timestamp >= ?", 
-            (chat_id, start_time)
-        )
-        messages = [row[0] for row in cursor.fetchall()]
-        print(f"[DEBUG] Retrieved {len(messages)} messages from DB.")
+        messages = await _read_messages(chat_id, start_time, end_time)
     except sqlite3.OperationalError as e:
         print(f"[ERROR] Database operation failed: {e}")
     except sqlite3.DatabaseError as e:
         print(f"[ERROR] General database error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
     return messages
 
+
+def build_segments(start_time, partials, messages):
+    """
+    Split a window into segments for summarize_segments: stored hourly partials
+    (str) in place of the hours they cover, and lists of raw messages for the
+    stretches in between.
+
+    :param partials: {hour: summary} for hours fully inside the window; an empty
+        summary marks an hour that had no messages.
+    :param messages: [(timestamp, text)] in the window, oldest first; those in
+        hours covered by a partial are skipped, so they need not be read at all.
+    """
+    segments, raw = [], []
+    position = 0
+    for hour in sorted(h for h in partials if h * BUCKET_SECONDS >= start_time):
+        hour_start, hour_end = hour * BUCKET_SECONDS, (hour + 1) * BUCKET_SECONDS
+        while position < len(messages) and messages[position][0] < hour_start:
+            raw.append(messages[position][1])
+            position += 1
+        if raw:
+            segments.append(raw)
+            raw = []
+        while position < len(messages) and messages[position][0] < hour_end:
+            position += 1  # covered by the partial
+        if partials[hour]:
+            segments.append(partials[hour])
+    raw.extend(text for _timestamp, text in messages[position:])
+    if raw:
+        segments.append(raw)
+    return segments
+
+
+def uncovered_ranges(start_time, partials):
+    """
+    The (start, end) stretches of the window from start_time that no partial in
+    {hour: summary} covers, oldest first; the last one is open-ended (end None).
+    """
+    ranges, position = [], start_time
+    for hour in sorted(h for h in partials if h * BUCKET_SECONDS >= start_time):
+        if hour * BUCKET_SECONDS > position:
+            ranges.append((position, hour * BUCKET_SECONDS))
+        position = (hour + 1) * BUCKET_SECONDS
+    ranges.append((position, None))
+    return ranges
+
+
+def _partial_hours(start_time, now):
+    """First and last hour whose partial can be used for a window [start_time, now)."""
+    return -(-start_time // BUCKET_SECONDS), bucket_for(now) - 1
+
+
+async def summarize_window(chat_id, start_time):
+    """
+    Summarize a chat from start_time until now.
+
+    Windows of COMPOSE_MIN_SECONDS or longer are composed from the stored hourly
+    partials; only the stretches without a partial (the current hour, the partial
+    hour at the start, hours the job missed) are summarized from raw messages.
+    """
+    now = int(time.time())
+    if now - start_time < COMPOSE_MIN_SECONDS:
+        return await summary_service.summarize(await fetch_messages(chat_id, start_time))
+
+    try:
+        partials = await fetch_partials(chat_id, *_partial_hours(start_time, now))
+    except sqlite3.DatabaseError as e:
+        print(f"[ERROR] Could not read hourly partials: {e}")
+        partials = {}
+    # Read only the stretches no partial covers, not every raw message in the window
+    ranges = uncovered_ranges(start_time, partials)
+    messages = [(row[3], row[2]) for row in await fetch_ranges(chat_id, ranges)]
+
+    print(f"[DEBUG] Chat {chat_id}: composing from {len(partials)} hourly partials and {len(messages)} messages.")
+    return await summary_service.compose(build_segments(start_time, partials, messages))
+
+
+def seconds_until_next_partial():
+    """Seconds until the hourly partial job should next run (shortly after the hour turns)."""
+    return BUCKET_SECONDS - int(time.time()) % BUCKET_SECONDS + PARTIAL_JOB_DELAY
+
+
+async def hourly_partial_summaries(_context):
+    """Job: materialize the summary of the hour that just ended for every chat active in it."""
+    hour = bucket_for(time.time()) - 1
+    start_time, end_time = hour * BUCKET_SECONDS, (hour + 1) * BUCKET_SECONDS
+
+    for chat_id in await distinct_chats(start_time):
+        try:
+            if await fetch_partials(chat_id, hour, hour):
+                continue  # already materialized (e.g. the job ran twice around a restart)
+            messages = await _read_messages(chat_id, start_time, end_time)
+            summary = await summary_service.run(summarize_hour, messages) if messages else ""
+            await save_partial(chat_id, hour, summary, len(messages))
+            print(f"[DEBUG] Stored hourly partial for chat {chat_id} ({len(messages)} messages).")
+        except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+            print(f"[ERROR] Database error while building hourly partial: {e}")
+        except (asyncio.TimeoutError, BrokenProcessPool, RuntimeError, ValueError, IndexError) as e:
+            print(f"[ERROR] Could not summarize hour {hour} for chat {chat_id}: {e}")
+
+
 async def daily_group_summary(context):
-    """Fetch and summarize messages from the last 24h for each chat and post in the group."""
-    conn = sqlite3.connect("messages.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT chat_id FROM messages")
-    chat_ids = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    """
+    Summarize the last 24h of every chat and post it in the group.
 
+    Runs as one batched pipeline: every chat's messages and hourly partials are
+    read in a single pass, all windows are summarized together in batched
+    inference, and the results are sent with bounded concurrency.
+    """
     now = int(time.time())
     start_time = now - 86400  # 24 hours ago
+    started = time.perf_counter()
+
+    chat_ids = await distinct_chats(start_time)
+    if not chat_ids:
+        return
+
+    windows = await fetch_windows(start_time)
+    try:
+        partials = await fetch_all_partials(*_partial_hours(start_time, now))
+    except sqlite3.DatabaseError as e:
+        print(f"[ERROR] Could not read hourly partials: {e}")
+        partials = {}
+
+    summaries = await summary_service.compose_many([
+        build_segments(start_time, partials.get(chat_id, {}), windows.get(chat_id, [])) for chat_id in chat_ids
+    ])
+
+    send_slots = asyncio.Semaphore(DAILY_SEND_CONCURRENCY)
 
-    for chat_id in chat_ids:
-        messages = fetch_messages(chat_id, start_time)
-        summary_text = summarize_messages(messages)
+    async def send(chat_id, summary_text):
+        async with send_slots:
+            try:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"📌 *Daily Summary for Today:* 📌\n\n{summary_text}",
+                    parse_mode="Markdown"
+                )
+            except TelegramError as e:
+                print(f"[ERROR] Could not send daily summary to chat {chat_id}: {e}")
 
-        if summary_text:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=f"📌 *Daily Summary for Today:* 📌\n\n{summary_text}",
-                parse_mode="Markdown"
-            )
+    await asyncio.gather(*(send(chat_id, text) for chat_id, text in zip(chat_ids, summaries) if text))
+    print(f"[DEBUG] Daily summaries for {len(chat_ids)} chats done in {time.perf_counter() - started:.1f}s.")
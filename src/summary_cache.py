@@ -0,0 +1,61 @@
+"""
+Module caching generated summaries per chat, window and newest message id.
+"""
+
+from collections import OrderedDict
+import os
+import time
+from singleflight import SingleFlight
+
+CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL", "900"))
+CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+
+
+class SummaryCache:
+    """TTL + LRU cache of summaries; identical in-flight requests share one computation (see singleflight)."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self._entries = OrderedDict()  # key -> (expires_at, summary)
+        self._flights = SingleFlight()
+
+    @property
+    def coalesced(self):
+        """Requests that waited for a summary already being computed."""
+        return self._flights.coalesced["summary"]
+
+    @property
+    def misses(self):
+        """Requests that computed a summary themselves."""
+        return self._flights.calls["summary"] - self.coalesced
+
+    async def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached summary for key, or await compute() to produce it.
+
+        :param compute: Zero-argument coroutine function producing the summary.
+        :param cacheable: Optional predicate; results it rejects (e.g. error text)
+            are returned to every waiter but not stored.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        return await self._flights.do("summary", key, lambda: self._compute_and_store(key, compute, cacheable))
+
+    async def _compute_and_store(self, key, compute, cacheable):
+        result = await compute()
+        if cacheable is None or cacheable(result):
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+
+summary_cache = SummaryCache()
@@ -0,0 +1,292 @@
+"""
+Module loading the BART summarization model and running inference; imported by the worker processes.
+"""
+import os
+import threading
+import time
+from extractive import select_salient
+from summary_worker import WORKERS
+
+# Checkpoint to load; sshleifer/distilbart-cnn-12-6 is a smaller distilled alternative
+MODEL_NAME = os.getenv("SUMMARIZER_MODEL", "facebook/bart-large-cnn")
+# "fp32", or "int8" for CPU inference with dynamically quantized linear layers
+PRECISION = os.getenv("SUMMARIZER_PRECISION", "fp32")
+# Torch intra-op threads per worker (0 = split the CPU cores evenly across the workers)
+THREADS = int(os.getenv("SUMMARIZER_THREADS", "0"))
+
+# Summarize every message in the window by map-reduce over token-budgeted chunks.
+# With SUMMARIZER_CHUNKED=0 the joined text is cut to its first 1024 characters instead.
+CHUNKED = os.getenv("SUMMARIZER_CHUNKED", "1") == "1"
+# Tokens per model input; BART's context is 1024 tokens including special tokens
+CHUNK_TOKENS = 900
+# Chunks fed to the model per forward pass (0 = size batches from available memory)
+BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "0"))
+# Rough memory one sequence in a generation batch needs, for automatic batch sizing
+MEMORY_PER_SEQUENCE_MB = 350
+# Drop noise and near-duplicates and keep the most salient messages within a token budget
+# before generation (see extractive.py); SUMMARIZER_EXTRACTIVE=0 feeds every message to the model
+EXTRACTIVE = os.getenv("SUMMARIZER_EXTRACTIVE", "1") == "1"
+EXTRACT_TOKENS = int(os.getenv("SUMMARIZER_EXTRACT_TOKENS", str(4 * CHUNK_TOKENS)))
+MAX_BATCH_SIZE = 16
+SUMMARY_MAX_TOKENS = 100
+SUMMARY_MIN_TOKENS = 20
+
+_pipeline = None
+_load_lock = threading.Lock()
+
+
+def resident_memory_mb():
+    """Return the current resident set size of this process in MB (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _available_memory_mb():
+    """Return MemAvailable in MB, or None where /proc/meminfo does not exist."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def batch_size():
+    """Sequences per generation batch: SUMMARIZER_BATCH_SIZE, or what currently fits in free memory."""
+    if BATCH_SIZE:
+        return BATCH_SIZE
+    available = _available_memory_mb()
+    if available is None:
+        return 4
+    return max(1, min(MAX_BATCH_SIZE, int(available // MEMORY_PER_SEQUENCE_MB)))
+
+
+def thread_count():
+    """Threads per worker process: SUMMARIZER_THREADS, or the cores shared out across the workers."""
+    if THREADS:
+        return THREADS
+    return max(1, (os.cpu_count() or 1) // max(1, WORKERS))
+
+
+def _load_pipeline(model_name=MODEL_NAME, precision=PRECISION):
+    """Import torch/transformers and build the summarization pipeline."""
+    # pylint: disable=import-outside-toplevel
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+    # Detect if GPU is available (MPS for Mac, CUDA for NVIDIA, fallback to CPU)
+    device = "mps" if torch.backends.mps.is_available() else "cpu"
+    if precision == "int8" and device != "cpu":
+        print("[DEBUG] int8 quantization is CPU-only; running on CPU.")
+        device = "cpu"
+    if device == "cpu":
+        torch.set_num_threads(thread_count())
+    print(f"[DEBUG] Using device: {device} ({precision}, {torch.get_num_threads()} threads)")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    if precision == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model = model.to(device).eval()
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=0 if device != "cpu" else -1)
+
+
+def get_summarizer():
+    """Return the summarization pipeline, loading the model on first use (None if loading fails)."""
+    global _pipeline  # pylint: disable=global-statement
+    with _load_lock:
+        if _pipeline is None:
+            memory_before = resident_memory_mb()
+            started = time.perf_counter()
+            try:
+                _pipeline = _load_pipeline()
+                print(
+                    f"[DEBUG] Summarization Model Loaded Successfully in {time.perf_counter() - started:.1f}s "
+                    f"(resident memory {memory_before:.0f} MB -> {resident_memory_mb():.0f} MB)"
+                )
+            except ImportError as e:
+                print(f"[ERROR] Summarization dependencies are not installed: {e}")
+            except ConnectionError:
+                print("[ERROR] Failed to connect to Hugging Face. Check your internet.")
+            except OSError as e:
+                print(f"[ERROR] Model loading failed (File issue): {e}")
+            except ValueError as e:
+                print(f"[ERROR] Model configuration issue: {e}")
+        return _pipeline
+
+
+def chunk_messages(messages, tokenizer, budget=CHUNK_TOKENS):
+    """
+    Greedily pack messages, in order, into text chunks of at most `budget` tokens.
+    A single message longer than the budget is split on token boundaries.
+    """
+    chunks = []
+    current, used = [], 0
+    for message, ids in zip(messages, tokenizer(list(messages), add_special_tokens=False)["input_ids"]):
+        cost = len(ids) + 1  # + the joining space
+        if current and used + cost > budget:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        if cost > budget:
+            chunks.extend(tokenizer.decode(ids[i:i + budget]) for i in range(0, len(ids), budget))
+            continue
+        current.append(message)
+        used += cost
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def prefilter(summarizer, messages):
+    """Extractive stage: the salient messages, within EXTRACT_TOKENS model tokens."""
+    if not EXTRACTIVE or not messages:
+        return messages
+    started = time.perf_counter()
+    counts = [len(ids) for ids in summarizer.tokenizer(list(messages), add_special_tokens=False)["input_ids"]]
+    selected = select_salient(messages, EXTRACT_TOKENS, counts)
+    print(
+        f"[DEBUG] Extractive filter kept {len(selected)} of {len(messages)} messages "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return selected
+
+
+def _generate(summarizer, texts):
+    """
+    Summarize each text in padded batches. Texts are ordered by length first so
+    each batch pads to similar lengths; results come back in the original order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    response = summarizer(
+        [texts[i] for i in order], max_length=SUMMARY_MAX_TOKENS, min_length=SUMMARY_MIN_TOKENS,
+        do_sample=False, truncation=True, batch_size=batch_size()
+    )
+    summaries = [None] * len(texts)
+    for index, item in zip(order, response):
+        summaries[index] = item["summary_text"]
+    return summaries
+
+
+def summarize_many(summarizer, documents):
+    """
+    Map-reduce summarization of several documents (lists of texts) at once: pack
+    each document into token-budgeted chunks, summarize the chunks of all documents
+    together in batches, and repeat on each document's partial summaries until it
+    fits in a single chunk. Every text contributes and the number of model calls
+    grows linearly with the input.
+    """
+    chunked = [chunk_messages(texts, summarizer.tokenizer) for texts in documents]
+    results = [None] * len(documents)
+    level = 0
+    while True:
+        pending = [i for i, chunks in enumerate(chunked) if results[i] is None and chunks]
+        if not pending:
+            return [result or "" for result in results]
+        level += 1
+        flat = [(i, chunk) for i in pending for chunk in chunked[i]]
+        outputs = _generate(summarizer, [chunk for _i, chunk in flat])
+        partials = {i: [] for i in pending}
+        for (i, _chunk), summary in zip(flat, outputs):
+            partials[i].append(summary)
+        for i in pending:
+            if len(chunked[i]) == 1:
+                results[i] = partials[i][0]
+            else:
+                chunked[i] = chunk_messages(partials[i], summarizer.tokenizer)
+        print(f"[DEBUG] Summary level {level}: {len(flat)} chunks from {len(pending)} documents")
+
+
+def summarize_hierarchical(summarizer, texts):
+    """Map-reduce summary of a single list of texts (see summarize_many)."""
+    return summarize_many(summarizer, [texts])[0]
+
+
+def _run_model(generate):
+    """Run generate(summarizer) and turn model failures into user-facing messages."""
+    summarizer = get_summarizer()
+    if summarizer is None:
+        return "Error: Summarization model is unavailable."
+
+    try:
+        summary = generate(summarizer)
+        print(f"[DEBUG] Summary Generated: {summary}")
+        return summary
+    except IndexError:
+        print("[ERROR] Model returned an unexpected empty response.")
+        return "Error: Model failed to generate a summary."
+    except RuntimeError as e:
+        print(f"[ERROR] Runtime error (likely due to memory): {e}")
+        return "Error: Model ran out of memory."
+    except ValueError as e:
+        print(f"[ERROR] Invalid input data: {e}")
+        return "Error: Invalid input for summarization."
+
+
+def summarize_messages(messages):
+    """Summarizes a list of messages using the configured BART checkpoint."""
+    if not messages:
+        print("[DEBUG] No messages found for summarization.")
+        return "No messages found in the selected timeframe."
+
+    print(f"[DEBUG] Generating summary for {len(messages)} messages...")
+
+    def generate(summarizer):
+        selected = prefilter(summarizer, messages)
+        if CHUNKED:
+            return summarize_hierarchical(summarizer, selected)
+        input_text = " ".join(selected)[:1024]  # ✅ Limit input to avoid errors
+        return _generate(summarizer, [input_text])[0]
+
+    return _run_model(generate)
+
+
+def summarize_segments_many(segment_lists):
+    """
+    Summarize several windows at once. Each window is a list of consecutive
+    segments: an already materialized hourly summary (str) or a list of raw
+    messages for a stretch not covered by one. All raw stretches are summarized
+    together, then each window's pieces are reduced into one summary, again
+    batched across windows.
+    """
+    results = ["No messages found in the selected timeframe."] * len(segment_lists)
+    live = [i for i, segments in enumerate(segment_lists) if segments]
+    if not live:
+        print("[DEBUG] No messages found for summarization.")
+        return results
+
+    print(f"[DEBUG] Composing {len(live)} summaries...")
+
+    def generate(summarizer):
+        raw = [(i, j) for i in live for j, seg in enumerate(segment_lists[i]) if not isinstance(seg, str)]
+        pieces = {i: list(segment_lists[i]) for i in live}
+        stretches = [prefilter(summarizer, segment_lists[i][j]) for i, j in raw]
+        for (i, j), summary in zip(raw, summarize_many(summarizer, stretches)):
+            pieces[i][j] = summary
+        multi = [i for i in live if len(pieces[i]) > 1]
+        reduced = dict(zip(multi, summarize_many(summarizer, [pieces[i] for i in multi])))
+        return [reduced.get(i, pieces[i][0]) for i in live]
+
+    outcome = _run_model(generate)
+    if isinstance(outcome, str):  # the whole batch failed
+        outcome = [outcome] * len(live)
+    for i, summary in zip(live, outcome):
+        results[i] = summary
+    return results
+
+
+def summarize_segments(segments):
+    """Summarize one window made of hourly partials and raw stretches (see summarize_segments_many)."""
+    return summarize_segments_many([segments])[0]
+
+
+def summarize_hour(messages):
+    """Summarize one hour of messages for storage; raises instead of returning error text."""
+    summarizer = get_summarizer()
+    if summarizer is None:
+        raise RuntimeError("summarization model is unavailable")
+    return summarize_hierarchical(summarizer, prefilter(summarizer, messages))
@@ -0,0 +1,169 @@
+"""
+Module running BART summarization in worker processes.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import time
+
+WORKERS = int(os.getenv("SUMMARIZER_WORKERS", "1"))
+MAX_CONCURRENT = int(os.getenv("SUMMARIZER_MAX_CONCURRENT", str(WORKERS)))
+TIMEOUT_SECONDS = float(os.getenv("SUMMARIZER_TIMEOUT", "180"))
+# Start the workers (and load the model) right after start-up instead of on the first /summary
+WARMUP_ON_START = os.getenv("SUMMARIZER_WARMUP", "0") == "1"
+# Stop the workers after this many seconds without a summary request (0 keeps them running)
+IDLE_UNLOAD_SECONDS = int(os.getenv("SUMMARIZER_IDLE_UNLOAD", "0"))
+
+
+def _init_worker():
+    """Runs once in every worker process: load the model so it stays resident there."""
+    # pylint: disable=import-outside-toplevel
+    from summary_model import get_summarizer
+    get_summarizer()
+
+
+def _summarize_in_worker(messages):
+    # pylint: disable=import-outside-toplevel
+    from summary_model import summarize_messages
+    return summarize_messages(messages)
+
+
+def _compose_in_worker(segments):
+    # pylint: disable=import-outside-toplevel
+    from summary_model import summarize_segments
+    return summarize_segments(segments)
+
+
+def _compose_many_in_worker(segment_lists):
+    # pylint: disable=import-outside-toplevel
+    from summary_model import summarize_segments_many
+    return summarize_segments_many(segment_lists)
+
+
+def _ping_worker():
+    return os.getpid()
+
+
+class SummaryService:
+    """Awaitable front end for a pool of summarization worker processes."""
+
+    def __init__(self, workers=WORKERS, max_concurrent=MAX_CONCURRENT, timeout=TIMEOUT_SECONDS):
+        self.workers = workers
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._executor = None
+        self._semaphore = None
+        self._in_flight = 0
+        self._last_used = time.monotonic()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),  # never fork the bot's threads
+                initializer=_init_worker,
+            )
+            print(f"[DEBUG] Started {self.workers} summarization worker process(es).")
+        return self._executor
+
+    def _stop_executor(self, executor=None, kill=False):
+        # Stops the given pool (the current one by default); a newer pool started meanwhile keeps running
+        if executor is None:
+            executor = self._executor
+        if executor is self._executor:
+            self._executor = None
+        if executor is None:
+            return
+        if kill:
+            # A timed-out inference cannot be cancelled; terminate the workers to reclaim them
+            for process in list(getattr(executor, "_processes", {}).values()):
+                process.terminate()
+        # Once the workers are gone the pool's manager thread exits promptly, so waiting is cheap
+        executor.shutdown(wait=kill, cancel_futures=True)
+
+    async def run(self, func, *args, timeout=None):
+        """Run func(*args) in a worker process, honouring the concurrency limit and timeout."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async with self._semaphore:
+            self._in_flight += 1
+            self._last_used = time.monotonic()
+            executor = self._get_executor()
+            try:
+                future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+                return await asyncio.wait_for(future, timeout or self.timeout)
+            except BrokenProcessPool:
+                self._stop_executor(executor)
+                raise
+            except asyncio.TimeoutError:
+                self._stop_executor(executor, kill=True)
+                raise
+            finally:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+
+    async def summarize(self, messages):
+        """Summarize a list of messages in a worker process."""
+        return await self._summary(_summarize_in_worker, messages)
+
+    async def compose(self, segments):
+        """Summarize a window from hourly partial summaries and raw message stretches (see summarize_segments)."""
+        return await self._summary(_compose_in_worker, segments)
+
+    async def compose_many(self, segment_lists):
+        """
+        Summarize many windows in one go (the nightly job). The windows are shared
+        out across the workers and each worker batches inference over its share.
+        """
+        shards = [segment_lists[i::self.workers] for i in range(min(self.workers, len(segment_lists)))]
+        try:
+            # Batching is never slower than one request per window, so scale the timeout to match
+            results = await asyncio.gather(*(
+                self.run(_compose_many_in_worker, shard, timeout=self.timeout * len(shard)) for shard in shards
+            ))
+        except asyncio.TimeoutError:
+            print("[ERROR] Batched summary generation timed out; worker recycled.")
+            return ["Error: Summary generation timed out."] * len(segment_lists)
+        except BrokenProcessPool as e:
+            print(f"[ERROR] Summarization worker died: {e}")
+            return ["Error: Summarization worker crashed. Please try again."] * len(segment_lists)
+
+        summaries = [None] * len(segment_lists)
+        for offset, shard_summaries in enumerate(results):
+            summaries[offset::len(shards)] = shard_summaries
+        return summaries
+
+    async def _summary(self, func, items):
+        if not items:
+            print("[DEBUG] No messages found for summarization.")
+            return "No messages found in the selected timeframe."
+        try:
+            return await self.run(func, items)
+        except asyncio.TimeoutError:
+            print(f"[ERROR] Summary generation exceeded {self.timeout:.0f}s; worker recycled.")
+            return "Error: Summary generation timed out."
+        except BrokenProcessPool as e:
+            print(f"[ERROR] Summarization worker died: {e}")
+            return "Error: Summarization worker crashed. Please try again."
+
+    async def warm_up(self, _context=None):
+        """Job: start the workers so the model is loaded before the first /summary."""
+        await asyncio.gather(*(self.run(_ping_worker) for _ in range(self.workers)), return_exceptions=True)
+
+    async def unload_if_idle(self, _context=None):
+        """Job: stop the workers (freeing the model memory) after IDLE_UNLOAD_SECONDS without requests."""
+        idle = time.monotonic() - self._last_used
+        if self._executor is not None and self._in_flight == 0 and idle > IDLE_UNLOAD_SECONDS:
+            self._stop_executor()
+            print(f"[DEBUG] Summarization workers stopped after {idle:.0f}s idle.")
+
+    def close(self):
+        """Stop the worker processes."""
+        self._stop_executor()
+
+
+summary_service = SummaryService()
@@ -0,0 +1,106 @@
+"""
+Module holding a local trigram index of movie and series titles for inline autocomplete.
+"""
+
+from collections import defaultdict
+import re
+import unicodedata
+from title_store import fetch_movie_titles, save_movie_titles
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_title(text):
+    """Lower-case a title, strip accents and reduce it to space-separated words."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join(WORD_PATTERN.findall("".join(char for char in decomposed if not unicodedata.combining(char))))
+
+
+def word_keys(word):
+    """Posting keys of a word: its first letter for one-letter words, else the trigrams of " " + word."""
+    if len(word) == 1:
+        return {word}
+    padded = " " + word
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """In-memory trigram index over every title seen, backed by the movie_titles table."""
+
+    def __init__(self):
+        self._titles = {}  # imdb_id -> (title, year, kind, poster)
+        self._normalized = {}  # imdb_id -> normalized title
+        self._postings = defaultdict(set)  # trigram or first letter -> imdb_ids
+        self._loaded = False
+
+    def __len__(self):
+        return len(self._titles)
+
+    def _index(self, imdb_id, title, year, kind, poster):
+        if imdb_id in self._normalized:
+            for word in self._normalized[imdb_id].split():
+                for key in word_keys(word) | {word[0]}:
+                    self._postings[key].discard(imdb_id)
+        normalized = normalize_title(title)
+        self._titles[imdb_id] = (title, year, kind, poster)
+        self._normalized[imdb_id] = normalized
+        for word in normalized.split():
+            for key in word_keys(word) | {word[0]}:
+                self._postings[key].add(imdb_id)
+
+    async def load(self):
+        """Fill the index from disk on first use."""
+        if self._loaded:
+            return
+        self._loaded = True
+        for row in await fetch_movie_titles():
+            self._index(*row)
+        print(f"[DEBUG] Loaded {len(self._titles)} movie titles into the title index.")
+
+    async def add(self, entries):
+        """
+        Index titles from OMDB entries (search results or a title's details); new or changed ones are saved.
+
+        :param entries: Dicts with imdbID, Title, Year and optionally Type and Poster.
+        """
+        await self.load()
+        rows = []
+        for entry in entries:
+            imdb_id, title = entry.get("imdbID"), entry.get("Title")
+            if not imdb_id or not title:
+                continue
+            known = self._titles.get(imdb_id, ("", "", "", ""))
+            # Detail and search responses carry different fields; keep what an earlier one had
+            fields = (entry.get(field) or old for field, old in zip(("Year", "Type", "Poster"), known[1:]))
+            row = (imdb_id, title, *fields)
+            if known != row[1:]:
+                self._index(*row)
+                rows.append(row)
+        if rows:
+            await save_movie_titles(rows)
+
+    def search(self, query, limit=10):
+        """
+        Return up to `limit` titles in which every query word starts a word, as
+        [(imdb_id, title, year, kind, poster)]: titles starting with the whole query
+        first, shorter titles first within each group.
+        """
+        words = normalize_title(query).split()
+        if not words:
+            return []
+        postings = sorted((self._postings.get(key, set()) for word in words for key in word_keys(word)), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        phrase = " ".join(words)
+        ranked = []
+        for imdb_id in candidates:
+            normalized = self._normalized[imdb_id]
+            title_words = normalized.split()
+            if not all(any(title_word.startswith(word) for title_word in title_words) for word in words):
+                continue  # shares the trigrams, but no title word starts with some query word
+            ranked.append((not normalized.startswith(phrase), len(normalized), normalized, imdb_id))
+        ranked.sort()
+        return [(imdb_id, *self._titles[imdb_id]) for _later, _length, _title, imdb_id in ranked[:limit]]
+
+
+title_index = TitleIndex()
@@ -0,0 +1,40 @@
+"""
+Module storing every movie and series title seen in OMDB responses.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS movie_titles (
+        imdb_id TEXT PRIMARY KEY,
+        title TEXT,
+        year TEXT,
+        kind TEXT,
+        poster TEXT
+    )
+'''
+
+
+def read_movie_titles(conn):
+    """Return [(imdb_id, title, year, kind, poster)] for every title seen in OMDB responses."""
+    return conn.execute("SELECT imdb_id, title, year, kind, poster FROM movie_titles").fetchall()
+
+
+def write_movie_titles(conn, rows):
+    """Create or update titles from (imdb_id, title, year, kind, poster) rows."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.executemany(
+            "INSERT OR REPLACE INTO movie_titles (imdb_id, title, year, kind, poster) VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+
+async def fetch_movie_titles():
+    """Await every title seen in OMDB responses."""
+    return await run_in_db_thread(read_movie_titles)
+
+
+async def save_movie_titles(rows):
+    """Await storing newly seen titles."""
+    await run_in_db_thread(write_movie_titles, rows)
+
+
+register_schema(SCHEMA)
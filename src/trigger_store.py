@@ -0,0 +1,52 @@
+"""
+Module storing the triggers configured per chat with /trigger.
+"""
+from db import register_schema, run_in_db_thread, transaction
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS triggers (
+        chat_id INTEGER,
+        phrase TEXT,
+        kind TEXT,
+        response TEXT,
+        PRIMARY KEY (chat_id, phrase)
+    )
+'''
+
+
+def read_triggers(conn, chat_id):
+    """Return the chat's configured triggers as (phrase, kind, response) rows."""
+    return conn.execute("SELECT phrase, kind, response FROM triggers WHERE chat_id = ?", (chat_id,)).fetchall()
+
+
+def write_trigger(conn, chat_id, phrase, kind, response):
+    """Create or replace the chat's trigger for a phrase."""
+    with transaction(conn, "IMMEDIATE"):
+        conn.execute(
+            "INSERT OR REPLACE INTO triggers (chat_id, phrase, kind, response) VALUES (?, ?, ?, ?)",
+            (chat_id, phrase, kind, response)
+        )
+
+
+def delete_trigger(conn, chat_id, phrase):
+    """Delete the chat's trigger for a phrase. Returns True if one existed."""
+    with transaction(conn, "IMMEDIATE"):
+        return conn.execute("DELETE FROM triggers WHERE chat_id = ? AND phrase = ?", (chat_id, phrase)).rowcount > 0
+
+
+async def fetch_triggers(chat_id):
+    """Await the chat's configured (phrase, kind, response) triggers."""
+    return await run_in_db_thread(read_triggers, chat_id)
+
+
+async def save_trigger(chat_id, phrase, kind, response):
+    """Await persisting a chat trigger."""
+    await run_in_db_thread(write_trigger, chat_id, phrase, kind, response)
+
+
+async def remove_trigger(chat_id, phrase):
+    """Await deleting a chat trigger; True if it existed."""
+    return await run_in_db_thread(delete_trigger, chat_id, phrase)
+
+
+register_schema(SCHEMA)
@@ -0,0 +1,267 @@
+"""
+Module matching incoming messages against GIF, sticker and emoji triggers with an Aho-Corasick automaton.
+"""
+
+from collections import deque
+import sqlite3
+from telegram import Update
+from telegram.constants import ChatType
+from telegram.ext import CommandHandler, CallbackContext
+from telegram.error import TelegramError
+from trigger_store import fetch_triggers, save_trigger, remove_trigger
+from media_cache import media_cache
+
+# Trigger kinds, highest priority first: a GIF beats a sticker beats an emoji
+KINDS = ("gif", "sticker", "emoji")
+# Stored for a chat to switch off one of the default triggers there
+DISABLED = "off"
+# Chat member statuses allowed to add and remove a group's triggers
+ADMIN_STATUSES = ("administrator", "creator")
+MAX_TRIGGERS_PER_CHAT = 500
+MIN_PHRASE_LENGTH = 2
+
+KEYWORDS = {
+    "cunts": "🍑",
+}
+
+STICKERS = {
+    "not worthwhile": "CAACAgQAAxkBAAEN7OJnw47vgltrMdG3wA9dbm8P-Gq36gACPA0AAscocVEUPP2IDSRDKDYE"
+}
+
+GIFS = {
+    "informer": "https://media3.giphy.com/media/"
+    "v1.Y2lkPTc5MGI3NjExcG0yODg0dXF2bml5YWhrc24ycmpxOTl3dnF6cGo0cmV2N2N4Y2QzOCZlcD12MV9pbnRlcm5hbF9naWZfYnlfaWQmY3Q9Zw/12jpDs6Z9rSQNO/giphy.gif",
+}
+
+DEFAULT_TRIGGERS = {
+    **{phrase: ("emoji", emoji) for phrase, emoji in KEYWORDS.items()},
+    **{phrase: ("sticker", sticker_id) for phrase, sticker_id in STICKERS.items()},
+    **{phrase: ("gif", gif_url) for phrase, gif_url in GIFS.items()},
+}
+
+
+class TriggerAutomaton:
+    """
+    Aho-Corasick automaton over trigger phrases.
+
+    Each node stores the best trigger ending there, its own or one reached through
+    its failure links, so matching is a single O(len(text)) walk.
+    """
+
+    def __init__(self, triggers):
+        """:param triggers: {phrase: (kind, response)}; DISABLED entries are skipped."""
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # per node: (priority, kind, response) of the best trigger ending here
+        for phrase, (kind, response) in triggers.items():
+            if kind in KINDS and phrase:
+                self._insert(phrase, (KINDS.index(kind), kind, response))
+        self._link()
+
+    def __len__(self):
+        return len(self._goto)
+
+    def _insert(self, phrase, output):
+        node = 0
+        for char in phrase:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            node = child
+        self._best[node] = output
+
+    def _link(self):
+        """Compute failure links breadth-first and fold each node's fail chain into its best output."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited[0] < self._best[child][0]):
+                    self._best[child] = inherited
+                queue.append(child)
+
+    def match(self, text):
+        """
+        Return (kind, response) of the highest-priority trigger found in text,
+        the earliest one among equals, or None.
+        """
+        goto, fail, best = self._goto, self._fail, self._best
+        found = None
+        found_priority = len(KINDS)
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            output = best[node]
+            if output is not None and output[0] < found_priority:
+                found, found_priority = (output[1], output[2]), output[0]
+                if found_priority == 0:  # nothing outranks the first GIF
+                    break
+        return found
+
+
+class TriggerRegistry:
+    """Per-chat trigger sets and their compiled automata, loaded from SQLite on first use."""
+
+    def __init__(self, defaults=None):
+        self.defaults = dict(DEFAULT_TRIGGERS if defaults is None else defaults)
+        self._default_automaton = TriggerAutomaton(self.defaults)
+        self._chat_triggers = {}  # chat_id -> {phrase: (kind, response)} as stored
+        self._automata = {}  # chat_id -> TriggerAutomaton (shared default one for unconfigured chats)
+
+    async def triggers(self, chat_id):
+        """Return the chat's stored {phrase: (kind, response)} overrides."""
+        configured = self._chat_triggers.get(chat_id)
+        if configured is None:
+            rows = await fetch_triggers(chat_id)
+            configured = self._chat_triggers[chat_id] = {phrase: (kind, response) for phrase, kind, response in rows}
+        return configured
+
+    async def custom(self, chat_id):
+        """Return the chat's own enabled triggers: its overrides without the switched-off defaults."""
+        return {phrase: entry for phrase, entry in (await self.triggers(chat_id)).items() if entry[0] != DISABLED}
+
+    async def effective(self, chat_id):
+        """Return every trigger active in the chat: the defaults overlaid with its own."""
+        merged = {**self.defaults, **await self.triggers(chat_id)}
+        return {phrase: entry for phrase, entry in merged.items() if entry[0] != DISABLED}
+
+    async def _automaton(self, chat_id):
+        automaton = self._automata.get(chat_id)
+        if automaton is None:
+            configured = await self.triggers(chat_id)
+            automaton = TriggerAutomaton({**self.defaults, **configured}) if configured else self._default_automaton
+            self._automata[chat_id] = automaton
+        return automaton
+
+    async def match(self, chat_id, text):
+        """Return (kind, response) for the trigger the message fires in this chat, or None."""
+        return (await self._automaton(chat_id)).match(text)
+
+    async def add(self, chat_id, phrase, kind, response):
+        """Store a chat trigger and rebuild that chat's automaton."""
+        configured = await self.triggers(chat_id)
+        await save_trigger(chat_id, phrase, kind, response)
+        configured[phrase] = (kind, response)
+        self._automata.pop(chat_id, None)
+
+    async def remove(self, chat_id, phrase):
+        """Remove a trigger from the chat (defaults are switched off). Returns False if it was not active."""
+        if phrase not in await self.effective(chat_id):
+            return False
+        configured = self._chat_triggers[chat_id]
+        if phrase in self.defaults:
+            await save_trigger(chat_id, phrase, DISABLED, "")
+            configured[phrase] = (DISABLED, "")
+        else:
+            await remove_trigger(chat_id, phrase)
+            configured.pop(phrase, None)
+        self._automata.pop(chat_id, None)
+        return True
+
+
+trigger_registry = TriggerRegistry()
+
+
+async def send_trigger_response(bot, chat_id, kind, response):
+    """Reply to a fired trigger with its GIF, sticker or emoji (media by cached file_id once sent)."""
+    if kind in ("gif", "sticker"):
+        await media_cache.send(bot, chat_id, kind, f"{kind}:{response}", response)
+    else:
+        await bot.send_message(chat_id=chat_id, text=response)
+
+
+def _parse_add(message, args):
+    """
+    Parse "/trigger add" arguments into (phrase, kind, response), or None.
+
+    Either "<gif|sticker|emoji> <response> <phrase...>", or just "<phrase...>" as a
+    reply to a GIF or sticker, which becomes the response.
+    """
+    reply = message.reply_to_message
+    if reply is not None and (reply.animation or reply.sticker) and args:
+        if reply.animation:
+            return " ".join(args), "gif", reply.animation.file_id
+        return " ".join(args), "sticker", reply.sticker.file_id
+    if len(args) >= 3 and args[0] in KINDS:
+        return " ".join(args[2:]), args[0], args[1]
+    return None
+
+
+async def _is_chat_admin(update: Update, context: CallbackContext) -> bool:
+    """Whether the sender may change the chat's triggers: a group admin, or anyone in a private chat."""
+    chat = update.message.chat
+    if chat.type == ChatType.PRIVATE:
+        return True
+    member = await context.bot.get_chat_member(chat.id, update.message.from_user.id)
+    return member.status in ADMIN_STATUSES
+
+
+async def trigger_command(update: Update, context: CallbackContext) -> None:
+    """Handle the Telegram /trigger command: add, remove or list the chat's triggers."""
+    print(f"Received /trigger command from user {update.message.from_user.id}")
+    chat_id = update.message.chat_id
+    action, args = (context.args[0].lower(), context.args[1:]) if context.args else ("", [])
+
+    try:
+        if action == "list":
+            active = await trigger_registry.effective(chat_id)
+            lines = [f"• {phrase} → {kind}" for phrase, (kind, _response) in sorted(active.items())]
+            text = "Triggers in this chat:\n" + "\n".join(lines) if lines else "No triggers in this chat."
+            await update.message.reply_text(text)
+
+        elif action in ("add", "remove") and not await _is_chat_admin(update, context):
+            await update.message.reply_text("❌ Only chat admins can change triggers.")
+
+        elif action == "add":
+            parsed = _parse_add(update.message, args)
+            if parsed is None:
+                await update.message.reply_text(
+                    "Usage: /trigger add <gif|sticker|emoji> <url, sticker id or emoji> <phrase>\n"
+                    "or reply to a GIF or sticker with /trigger add <phrase>"
+                )
+                return
+            phrase, kind, response = parsed
+            if len(phrase) < MIN_PHRASE_LENGTH:
+                await update.message.reply_text(f"❌ Trigger phrases need at least {MIN_PHRASE_LENGTH} characters.")
+                return
+            custom = await trigger_registry.custom(chat_id)
+            if phrase not in custom and len(custom) >= MAX_TRIGGERS_PER_CHAT:
+                await update.message.reply_text(f"❌ This chat already has {MAX_TRIGGERS_PER_CHAT} triggers.")
+                return
+            await trigger_registry.add(chat_id, phrase, kind, response)
+            await update.message.reply_text(f"✅ \"{phrase}\" now triggers a {kind}.")
+
+        elif action == "remove" and args:
+            phrase = " ".join(args)
+            if await trigger_registry.remove(chat_id, phrase):
+                await update.message.reply_text(f"✅ \"{phrase}\" no longer triggers anything here.")
+            else:
+                await update.message.reply_text(f"❌ No trigger for \"{phrase}\" in this chat.")
+
+        else:
+            await update.message.reply_text("Usage: /trigger add|remove|list ...")
+
+    except (sqlite3.OperationalError, sqlite3.DatabaseError) as e:
+        print(f"[ERROR] Database error: {e}")
+        await update.message.reply_text("❌ Could not update triggers. Please try again later.")
+    except TelegramError as e:
+        print(f"[ERROR] Telegram API error: {e}")
+
+
+def register_trigger_handler(app) -> None:
+    """
+    Register the /trigger command handler with the Telegram application.
+    """
+    print("Registering /trigger command handler")
+    app.add_handler(CommandHandler("trigger", trigger_command))
@@ -2,105 +2,115 @@
 Module for fetching weather data and handling the Telegram /weather command.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import sqlite3
+import httpx
 from telegram import Update
 from telegram.ext import Application, CommandHandler, CallbackContext
+from latency_budget import with_latency_budget
+from forecast import current_weather, current_weather_many
+from geocode import geocoder, COUNTRY_SUFFIXES
+from weather_station import station_poller
+
+# Most locations compared by one /weather command
+MAX_LOCATIONS = 8
+RAINY_CODES = (61, 63, 65, 80, 81, 82)
+ALIASES = {"amazingstoke": "Basingstoke"}
+
+
+def split_locations(text):
+    """Split "london, leeds, saltney" into locations; a trailing country ("Chester, UK") stays with its place."""
+    locations = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if locations and part.casefold() in COUNTRY_SUFFIXES:
+            locations[-1] += ", " + part
+        else:
+            locations.append(part)
+    return locations
 
-def get_saltney_weather() -> str:
-    """Fetch the weather from wx.ja91.uk for Saltney."""
-    url = "http://wx.ja91.uk/"
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        temperature_element = soup.find(text="Outside Temperature")
+def _condition(weather_data):
+    return "Rainy" if weather_data['weathercode'] in RAINY_CODES else "Clear/Cloudy"
 
-        if temperature_element:
-            temperature_value = temperature_element.find_next().text.strip()
-            return (
-                f"Current Outside Temperature in Saltney: {temperature_value}\n"
-                f"Provided to you by Jake's Weather Station\nhttp://wx.ja91.uk"
-            )
 
-        print("Could not find 'Outside Temperature' on wx.ja91.uk")
-        return "Weather data for Saltney is unavailable."
-    except requests.RequestException as exc:
-        print("Error fetching Saltney weather: %s", exc)
-        return "Unable to retrieve Saltney weather at this time."
+async def get_saltney_weather() -> str:
+    """Report the latest readings of wx.ja91.uk for Saltney (polled in the background)."""
+    return await station_poller.report()
 
 
-def get_weather(location: str) -> str:
+async def get_weather(location: str) -> str:
     """
     Get the current weather for a given location or UK postcode.
-    If the location is 'saltney', fetch data from wx.ja91.uk.
-    Otherwise, use geocoding APIs and the Open-Meteo weather API.
+    If the location is 'saltney', report the wx.ja91.uk station readings.
+    Otherwise, geocode the location (offline for UK postcodes, cached for
+    places seen before) and use the Open-Meteo weather API.
     """
     if location.lower() == "saltney":
-        return get_saltney_weather()
+        return await get_saltney_weather()
 
-    if location.lower() == "amazingstoke":
-        location = "Basingstoke"
+    location = ALIASES.get(location.lower(), location)
 
     print("Fetching weather for: %s", location)
-    geocode_data = None
-
-    # Check if input is a UK postcode (basic pattern matching)
-    if location.replace(" ", "").isalnum() and any(char.isdigit() for char in location):
-        print("Detected UK postcode, using Nominatim geocoding")
-        geocode_url = (
-            f"https://nominatim.openstreetmap.org/search?format=json&q={location}, UK"
-        )
-        geocode_response = requests.get(
-            geocode_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10
-        )
-        if geocode_response.status_code == 200 and geocode_response.json():
-            geocode_data = geocode_response.json()[0]
-            latitude = float(geocode_data["lat"])
-            longitude = float(geocode_data["lon"])
-            print(
-                "Geocoded %s to lat: %s, lon: %s", location, latitude, longitude
-            )
-
-    if not geocode_data:
-        geocode_url = (
-            "https://geocoding-api.open-meteo.com/v1/search?"
-            f"name={location}&count=1&language=en&format=json"
-        )
-        geocode_response = requests.get(geocode_url, timeout=10)
-        if (
-            geocode_response.status_code == 200
-            and "results" in geocode_response.json()
-        ):
-            geocode_data = geocode_response.json()["results"][0]
-            latitude = float(geocode_data["latitude"])
-            longitude = float(geocode_data["longitude"])
-            print(
-                "Geocoded %s to lat: %s, lon: %s", location, latitude, longitude
-            )
-
-    if not geocode_data:
+    coordinates = await geocoder.geocode(location)
+    if coordinates is None:
         print("Location not found: %s", location)
         return "Location not found. Please enter a valid city name or UK postcode."
+    latitude, longitude = coordinates
 
-    weather_url = (
-        "https://api.open-meteo.com/v1/forecast?"
-        f"latitude={latitude}&longitude={longitude}&current_weather=true"
-    )
-    weather_response = requests.get(weather_url, timeout=10)
-    if weather_response.status_code == 200:
-        weather_data = weather_response.json()['current_weather']
+    forecast = await current_weather(latitude, longitude)
+    if forecast:
+        weather_data = forecast['current_weather']
         temperature = weather_data['temperature']
-        weather_description = "Rainy" if weather_data['weathercode'] in [61, 63, 65, 80, 81, 82] else "Clear/Cloudy"
+        weather_description = _condition(weather_data)
         print("Weather data: %s°C, Condition: %s", temperature, weather_description)
         return (
             f"Current weather in {location.capitalize()}:\n"
             f"🌡 Temperature: {temperature}°C\n☁ Condition: {weather_description}"
         )
-    print("Error fetching weather data: %s, weather_response.text")
+    print("Error fetching weather data for %s", location)
     return "Error retrieving weather data. Please try again later."
 
+
+async def get_weather_many(locations) -> str:
+    """
+    Compare the current weather of several locations in one table. The locations are
+    geocoded concurrently and all their forecasts come from a single Open-Meteo request.
+    """
+    places = [ALIASES.get(location.lower(), location) for location in locations]
+    print("Fetching weather for: %s", ", ".join(places))
+    lookups = await asyncio.gather(
+        *(station_poller.current_temperature() if place.lower() == "saltney" else geocoder.geocode(place)
+          for place in places),
+        return_exceptions=True,
+    )
+    for result in lookups:
+        if isinstance(result, BaseException) and not isinstance(result, httpx.HTTPError):
+            raise result
+    points = [result for result in lookups if isinstance(result, tuple)]
+    forecasts = iter(await current_weather_many(points) if points else [])
+
+    lines = ["Current weather:"]
+    for location, place, result in zip(locations, places, lookups):
+        if place.lower() == "saltney":
+            report = f"🌡 {result} (Jake's Weather Station)" if result else "unavailable"
+        elif isinstance(result, httpx.HTTPError):
+            report = "lookup failed"
+        elif result is None:
+            report = "not found"
+        else:
+            forecast = next(forecasts)
+            if forecast:
+                weather_data = forecast['current_weather']
+                report = f"🌡 {weather_data['temperature']}°C ☁ {_condition(weather_data)}"
+            else:
+                report = "unavailable"
+        lines.append(f"📍 {location.capitalize()}: {report}")
+    return "\n".join(lines)
+
+@with_latency_budget()
 async def weather_command(update: Update, context: CallbackContext) -> None:
     """Handle the Telegram /weather command."""
     print("Received /weather command from user %s", update.message.from_user.id)
@@ -108,12 +118,25 @@ async def weather_command(update: Update, context: CallbackContext) -> None:
         print("No location provided with /weather command")
         await context.bot.send_message(
             chat_id=update.message.chat_id,
-            text="Usage: /weather <city or UK postcode>",
+            text="Usage: /weather <city or UK postcode>[, <another>...]",
         )
         return
 
     location = " ".join(context.args)
-    weather_report = get_weather(location)
+    locations = split_locations(location)
+    try:
+        if len(locations) > 1:
+            weather_report = await get_weather_many(locations[:MAX_LOCATIONS])
+            if len(locations) > MAX_LOCATIONS:
+                weather_report += f"\n(only the first {MAX_LOCATIONS} locations are shown)"
+        else:
+            weather_report = await get_weather(location)
+    except httpx.HTTPError as exc:
+        print(f"[ERROR] Weather lookup failed: {exc!r}")
+        weather_report = "Error retrieving weather data. Please try again later."
+    except sqlite3.Error as e:
+        print(f"[ERROR] Database error: {e}")
+        weather_report = "Error retrieving weather data. Please try again later."
     print("Sending weather report for %s", location)
     await context.bot.send_message(
         chat_id=update.message.chat_id, text=weather_report
@@ -0,0 +1,186 @@
+"""
+Module polling Jake's weather station (wx.ja91.uk) for /weather saltney.
+"""
+
+from collections import deque
+from html.parser import HTMLParser
+import json
+import os
+import re
+import sqlite3
+import time
+import httpx
+from http_client import get
+from station_store import save_station_reading, fetch_station_readings
+from singleflight import upstream_flights
+
+STATION_URL = "http://wx.ja91.uk/"
+POLL_SECONDS = int(os.getenv("STATION_POLL_SECONDS", "60"))
+HISTORY_DAYS = int(os.getenv("STATION_HISTORY_DAYS", "7"))
+# Readings not confirmed by the station for this long are reported with their age
+STALE_SECONDS = 900
+RANGE_SECONDS = 86400
+# Reading labels on the station page (weewx skins), in reply order
+FIELDS = (
+    "Outside Temperature", "Feels Like", "Heat Index", "Wind Chill", "Dewpoint", "Dew Point",
+    "Outside Humidity", "Humidity", "Barometer", "Wind", "Rain Today", "Rain Rate", "UV Index",
+)
+TEMPERATURE = "Outside Temperature"
+PARSE_CHUNK = 4096
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class ReadingsParser(HTMLParser):
+    """Collects {label: value} where value is the first text after a known label's text."""
+
+    def __init__(self, labels=FIELDS):
+        super().__init__(convert_charrefs=True)
+        self._labels = {label.casefold(): label for label in labels}
+        self._pending = None
+        self._skipping = 0
+        self.readings = {}
+
+    @property
+    def done(self):
+        """Whether every label has been found, so the rest of the page can be skipped."""
+        return len(self.readings) == len(self._labels)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if not text or self._skipping:
+            return
+        if self._pending is not None:
+            self.readings[self._pending] = text
+            self._pending = None
+            return
+        label = self._labels.get(text.rstrip(":").casefold())
+        if label is not None and label not in self.readings:
+            self._pending = label
+
+
+def parse_readings(html):
+    """Return the station readings in a page as {label: value}, in FIELDS order."""
+    parser = ReadingsParser()
+    found = idle_chunks = 0
+    for start in range(0, len(html), PARSE_CHUNK):
+        parser.feed(html[start:start + PARSE_CHUNK])
+        if parser.done:
+            break
+        # The readings sit together in one table: stop a couple of chunks past the last one
+        idle_chunks = idle_chunks + 1 if len(parser.readings) == found else 0
+        found = len(parser.readings)
+        if found and idle_chunks >= 2:
+            break
+    return {label: parser.readings[label] for label in FIELDS if label in parser.readings}
+
+
+def _temperature(readings):
+    match = NUMBER_PATTERN.search(readings.get(TEMPERATURE, ""))
+    return float(match.group()) if match else None
+
+
+class StationPoller:
+    """Latest station snapshot plus a day of temperatures, refreshed by conditional GETs."""
+
+    def __init__(self, url=STATION_URL):
+        self.url = url
+        self.readings = None
+        self.changed_at = None  # when the current readings first appeared
+        self.checked_at = None  # last time the station answered
+        self.updates = 0
+        self.not_modified = 0
+        self._etag = None
+        self._last_modified = None
+        self._temperatures = None  # deque of (time, temperature) over the last RANGE_SECONDS
+
+    async def _load_history(self):
+        self._temperatures = deque()
+        try:
+            rows = await fetch_station_readings(time.time() - RANGE_SECONDS)
+        except sqlite3.Error as e:
+            print(f"[ERROR] Could not read the station history: {e}")
+            return
+        for observed_at, readings in rows:
+            self._record(observed_at, json.loads(readings))
+        if rows and self.readings is None:
+            self.changed_at, self.readings = rows[-1][0], json.loads(rows[-1][1])
+
+    def _record(self, observed_at, readings):
+        temperature = _temperature(readings)
+        if temperature is not None:
+            self._temperatures.append((observed_at, temperature))
+        while self._temperatures and self._temperatures[0][0] < observed_at - RANGE_SECONDS:
+            self._temperatures.popleft()
+
+    async def _poll(self):
+        if self._temperatures is None:
+            await self._load_history()
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        response = await get(self.url, headers=headers)
+        now = time.time()
+        if response.status_code == 304:
+            self.not_modified += 1
+            self.checked_at = now
+            return
+        response.raise_for_status()
+
+        readings = parse_readings(response.text)
+        if TEMPERATURE not in readings:
+            print(f"[ERROR] No '{TEMPERATURE}' found on {self.url}; keeping the previous readings.")
+            return
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        self.checked_at = now
+        self.updates += 1
+        if readings != self.readings:
+            self.readings, self.changed_at = readings, now
+            self._record(now, readings)
+            try:
+                await save_station_reading(now, json.dumps(readings), now - HISTORY_DAYS * 86400)
+            except sqlite3.Error as e:
+                print(f"[ERROR] Could not store the station reading: {e}")
+
+    async def poll(self, _context=None):
+        """Fetch the station page if it changed (job_queue job); failures keep the last snapshot."""
+        try:
+            await upstream_flights.do("saltney", self.url, self._poll)
+        except httpx.HTTPError as exc:
+            print(f"[ERROR] Polling the Saltney weather station failed: {exc!r}")
+
+    async def current_temperature(self):
+        """The latest outside temperature reading (e.g. "12.3°C"), or None if the station can't be read."""
+        if self.readings is None:
+            await self.poll()
+        return self.readings[TEMPERATURE] if self.readings else None
+
+    async def report(self) -> str:
+        """The /weather saltney reply, from the latest snapshot (polling first only if there is none)."""
+        if await self.current_temperature() is None:
+            return "Weather data for Saltney is unavailable."
+
+        lines = [f"Current Outside Temperature in Saltney: {self.readings[TEMPERATURE]}"]
+        lines += [f"{label}: {value}" for label, value in self.readings.items() if label != TEMPERATURE]
+        temperatures = [temperature for _time, temperature in self._temperatures or ()]
+        if len(temperatures) > 1:
+            unit = NUMBER_PATTERN.sub("", self.readings[TEMPERATURE]).strip()
+            lines.append(f"Last 24h: {min(temperatures):g}{unit} to {max(temperatures):g}{unit}")
+        age = time.time() - (self.checked_at or self.changed_at)
+        if age > STALE_SECONDS:
+            lines.append(f"(station last reached {age / 60:.0f} minutes ago)")
+        lines.append("Provided to you by Jake's Weather Station\nhttp://wx.ja91.uk")
+        return "\n".join(lines)
+
+
+station_poller = StationPoller()
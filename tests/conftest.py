@@ -0,0 +1,43 @@
+"""
+Shared pytest setup: the bot's modules live in src/ and are imported by name, against a throwaway database.
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+os.environ.setdefault("MESSAGES_DB", os.path.join(tempfile.mkdtemp(prefix="talbot-tests-"), "messages.db"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the shared test database's tables (of every store the collected tests imported), as main() does."""
+    # pylint: disable=import-outside-toplevel
+    from message_store import init_db
+    from db import init_schemas
+    init_db()
+    init_schemas()
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Connection to a freshly initialised message database of the test's own."""
+    from message_store import connect, init_db  # pylint: disable=import-outside-toplevel
+    db_file = str(tmp_path / "messages.db")
+    init_db(db_file)
+    connection = connect(db_file)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def insert_messages(conn):  # pylint: disable=redefined-outer-name
+    """Return a function writing (id, chat_id, user_id, message, timestamp) rows into the conn database."""
+    from message_store import insert_rows, transaction  # pylint: disable=import-outside-toplevel
+
+    def insert(rows):
+        with transaction(conn, "IMMEDIATE"):
+            insert_rows(conn, rows)
+    return insert
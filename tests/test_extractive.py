@@ -0,0 +1,41 @@
+"""
+Tests for the extractive pre-filter that runs before summarization.
+"""
+from extractive import select_salient, estimate_tokens
+
+CHAT = [
+    "lol",
+    "We should book the train tickets to Chester for Saturday morning",
+    "ok",
+    "The train to Chester leaves at nine from platform two",
+    "We should book the train tickets to Chester for Saturday morning",
+    "Does anyone know if the museum is open on Saturday",
+    "👍",
+    "I think the museum opens at ten and closes at five",
+    "Remember to bring an umbrella because rain is forecast",
+    "haha yes",
+]
+
+
+def test_noise_and_repeats_are_dropped_in_original_order():
+    selected = select_salient(CHAT, token_budget=10_000)
+    assert "lol" not in selected
+    assert "ok" not in selected
+    assert selected.count(CHAT[1]) == 1
+    positions = [CHAT.index(message) for message in selected]
+    assert positions == sorted(positions)
+
+
+def test_selection_fits_the_token_budget():
+    counts = [estimate_tokens(message) for message in CHAT]
+    budget = 30
+    selected = select_salient(CHAT, budget, counts)
+    assert selected
+    assert sum(counts[CHAT.index(message)] for message in selected) <= budget
+    positions = [CHAT.index(message) for message in selected]
+    assert positions == sorted(positions)
+
+
+def test_only_noise_is_returned_unchanged():
+    noise = ["lol", "ok", "👍"]
+    assert select_salient(noise, 100) == noise
@@ -0,0 +1,77 @@
+"""
+Tests for how the shared HTTP client reports attempts to the circuit breakers.
+"""
+import asyncio
+import httpx
+import pytest
+import http_client
+from circuit_breaker import breaker_for, CLOSED, OPEN
+from latency_budget import with_latency_budget
+
+
+def _timing_out_client():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _get_with_retries_off(url):
+    return http_client.get(url, retries=0)
+
+
+def _run_gets(url, count, budget=None):
+    async def scenario():
+        http_client._client = _timing_out_client()  # pylint: disable=protected-access
+        fetch = _get_with_retries_off if budget is None else with_latency_budget(budget)(_get_with_retries_off)
+        try:
+            for _ in range(count):
+                with pytest.raises(httpx.TimeoutException):
+                    await fetch(url)
+        finally:
+            await http_client.close_http_client()
+    asyncio.run(scenario())
+
+
+def test_full_timeouts_open_the_breaker():
+    _run_gets("https://full-timeout.example/", 3)
+    assert breaker_for("full-timeout.example").state == OPEN
+
+
+def test_budget_shortened_timeouts_are_not_failures():
+    _run_gets("https://short-timeout.example/", 5, budget=1.0)
+    breaker = breaker_for("short-timeout.example")
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+
+
+def test_json_or_none_rejects_error_pages():
+    request = httpx.Request("GET", "https://api.example/")
+    html = httpx.Response(502, text="<html>Bad Gateway</html>", request=request)
+    empty_ok = httpx.Response(200, text="", request=request)
+    payload = httpx.Response(200, json={"joke": "ok"}, request=request)
+    unauthorized = httpx.Response(401, json={"Error": "Invalid API key!"}, request=request)
+
+    assert http_client.json_or_none(html) is None
+    assert http_client.json_or_none(html, (502,)) is None
+    assert http_client.json_or_none(empty_ok) is None
+    assert http_client.json_or_none(payload) == {"joke": "ok"}
+    assert http_client.json_or_none(unauthorized) is None
+    assert http_client.json_or_none(unauthorized, (200, 401)) == {"Error": "Invalid API key!"}
+
+
+def test_on_attempt_runs_for_every_retry(monkeypatch):
+    async def scenario():
+        attempts = []
+
+        def handler(request):
+            return httpx.Response(503, request=request)
+
+        http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))  # pylint: disable=protected-access
+        try:
+            response = await http_client.get("https://retried.example/", retries=2, on_attempt=lambda: attempts.append(1))
+        finally:
+            await http_client.close_http_client()
+        return response.status_code, len(attempts)
+
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF_SECONDS", 0)
+    assert asyncio.run(scenario()) == (503, 3)
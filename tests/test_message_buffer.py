@@ -0,0 +1,45 @@
+"""
+Tests for the per-chat in-memory message buffer.
+"""
+from message_buffer import MessageBuffer
+
+
+def _buffer(**limits):
+    buffer = MessageBuffer(**limits)
+    buffer.started_at = buffer.evicted_until = 1000
+    return buffer
+
+
+def test_window_is_served_only_when_complete():
+    buffer = _buffer(max_messages_per_chat=2)
+    for n, text in enumerate(("one", "two", "three")):
+        buffer.append(1, n, 1000 + n, text)
+
+    assert buffer.window(1, 1001) == ["two", "three"]
+    assert buffer.window(1, 1000) is None  # "one" was dropped to respect the per-chat cap
+    assert buffer.window(2, 1000) == []  # a quiet chat: nothing since the bot started
+
+
+def test_evicted_chats_leave_no_state_behind():
+    buffer = _buffer(max_total_chars=10)
+    for chat_id in range(100):
+        buffer.append(chat_id, chat_id, 1000 + chat_id, "12345")
+
+    assert len(buffer._chats) == 2  # pylint: disable=protected-access
+    assert buffer.total_chars == 10
+    assert buffer.window(98, 1098) == ["12345"]
+    # An evicted chat's messages are gone, so its windows fall back to SQLite...
+    assert buffer.window(5, 1000) is None
+    # ...until they start after everything that was evicted
+    assert buffer.window(5, 1098) == []
+
+
+def test_chat_written_again_after_eviction_stays_incomplete_before_it():
+    buffer = _buffer(max_total_chars=10)
+    buffer.append(1, 1, 1001, "12345")
+    buffer.append(2, 2, 1002, "12345")
+    buffer.append(3, 3, 1003, "12345")  # evicts chat 1
+    buffer.append(1, 4, 1004, "abc")  # evicts chat 2
+
+    assert buffer.window(1, 1000) is None
+    assert buffer.window(1, 1003) == ["abc"]
@@ -0,0 +1,79 @@
+"""
+Tests for the hourly-bucketed message store.
+"""
+import asyncio
+import message_store
+from message_store import BUCKET_SECONDS, connect, init_db
+
+HOUR = 480000  # an arbitrary bucket number
+BASE = HOUR * BUCKET_SECONDS
+
+
+def test_legacy_table_is_migrated_into_buckets(tmp_path):
+    db_file = str(tmp_path / "legacy.db")
+    legacy = connect(db_file)
+    legacy.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY, chat_id INTEGER, user_id INTEGER, "
+                   "message TEXT, timestamp INTEGER)")
+    legacy.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?)", [
+        (1, 10, 1, "first hour", BASE + 5),
+        (2, 10, 2, "second hour", BASE + BUCKET_SECONDS + 5),
+        (3, 20, 1, "other chat", BASE + 10),
+    ])
+    legacy.commit()
+    legacy.close()
+
+    init_db(db_file)
+    conn = connect(db_file)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "messages" not in tables
+        assert message_store.list_buckets(conn) == [HOUR, HOUR + 1]
+        assert message_store.read_range(conn, 10, BASE) == [
+            (1, 1, "first hour", BASE + 5), (2, 2, "second hour", BASE + BUCKET_SECONDS + 5)
+        ]
+        assert message_store.read_last_id(conn) == 3
+        assert sorted(message_store.read_chat_ids(conn, BASE)) == [10, 20]
+    finally:
+        conn.close()
+
+
+def test_purge_drops_only_whole_expired_buckets(conn, insert_messages):
+    insert_messages([
+        (1, 10, 1, "oldest", BASE + 1),
+        (2, 10, 1, "old", BASE + BUCKET_SECONDS + 1),
+        (3, 10, 1, "current", BASE + 2 * BUCKET_SECONDS + 1),
+    ])
+    # The cutoff falls inside the third hour: that bucket still holds live messages
+    dropped = message_store.drop_expired_buckets(conn, BASE + 2 * BUCKET_SECONDS + 1800)
+
+    assert dropped == 2
+    assert message_store.list_buckets(conn) == [HOUR + 2]
+    assert [row[2] for row in message_store.read_range(conn, 10, 0)] == ["current"]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert f"messages_{HOUR}" not in tables
+
+
+def test_read_last_message_id_takes_the_newest_bucket(conn, insert_messages):
+    insert_messages([
+        (1, 10, 1, "a", BASE + 1),
+        (2, 20, 1, "b", BASE + 2),
+        (3, 10, 1, "c", BASE + BUCKET_SECONDS + 1),
+        (4, 20, 1, "d", BASE + 3),
+    ])
+    assert message_store.read_last_message_id(conn, 10) == 3
+    assert message_store.read_last_message_id(conn, 20) == 4
+    assert message_store.read_last_message_id(conn, 30) == 0
+
+
+def test_last_message_id_includes_queued_messages():
+    async def scenario():
+        first = message_store.store_message(77, 1, "queued", BASE + 1)
+        second = message_store.store_message(77, 1, "queued again", BASE + 2)
+        latest = await message_store.last_message_id(77)
+        rows = await message_store.fetch_range(77, BASE)
+        return first, second, latest, rows
+
+    first, second, latest, rows = asyncio.run(scenario())
+    assert second > first
+    assert latest == second
+    assert [row[0] for row in rows] == [first, second]
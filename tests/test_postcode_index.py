@@ -0,0 +1,70 @@
+"""
+Tests for the memory-mapped outward-postcode index.
+"""
+import pytest
+from postcode_index import PostcodeIndex, outward_code, write_index
+
+CENTROIDS = {
+    "AB10": (57.13514, -2.11731),
+    "B1": (52.47891, -1.90592),
+    "CH4": (53.17396, -2.95063),
+    "M1": (53.47962, -2.23524),
+    "SW1A": (51.50100, -0.14157),
+    "ZE3": (59.88078, -1.30500),
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "outcodes.bin")
+    write_index(path, CENTROIDS)
+    return PostcodeIndex(path)
+
+
+def test_every_code_is_found_including_first_and_last(index):
+    assert len(index) == len(CENTROIDS)
+    for code, (latitude, longitude) in CENTROIDS.items():
+        found = index.lookup(code)
+        assert found == pytest.approx((latitude, longitude), abs=1e-4)
+
+
+def test_codes_outside_and_between_records_are_missing(index):
+    assert index.lookup("AA1") is None  # sorts before the first record
+    assert index.lookup("ZZ99") is None  # sorts after the last record
+    assert index.lookup("CH5") is None  # between two records
+    assert index.lookup("AB1") is None  # a prefix of the first record
+    assert index.lookup("TOOLONG") is None
+    assert index.lookup("") is None
+
+
+def test_lookup_is_case_insensitive(index):
+    assert index.lookup("ch4") == index.lookup("CH4")
+
+
+def test_empty_index(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    write_index(path, {})
+    assert PostcodeIndex(path).lookup("CH4") is None
+
+
+def test_single_record_index(tmp_path):
+    path = str(tmp_path / "single.bin")
+    write_index(path, {"CH4": (53.17, -2.95)})
+    index = PostcodeIndex(path)
+    assert index.lookup("CH4") == pytest.approx((53.17, -2.95), abs=1e-4)
+    assert index.lookup("A1") is None
+    assert index.lookup("Z1") is None
+
+
+def test_missing_or_corrupt_file_disables_the_index(tmp_path):
+    assert PostcodeIndex(str(tmp_path / "missing.bin")).lookup("CH4") is None
+    corrupt = tmp_path / "corrupt.bin"
+    corrupt.write_bytes(b"not an index at all")
+    assert PostcodeIndex(str(corrupt)).lookup("CH4") is None
+
+
+def test_outward_code():
+    assert outward_code("ch4 8ab") == "CH4"
+    assert outward_code("SW1A1AA") == "SW1A"
+    assert outward_code("M1") == "M1"
+    assert outward_code("chester") is None
@@ -0,0 +1,101 @@
+"""
+Tests for serving cached upstream responses when the upstream fails.
+"""
+import asyncio
+import httpx
+import pytest
+import response_cache
+from response_cache import ResponseCache
+
+
+def _failing_fetch():
+    async def fetch():
+        raise httpx.ConnectError("upstream down")
+    return fetch
+
+
+def _fetch_value(value):
+    async def fetch():
+        return value
+    return fetch
+
+
+def test_expired_entry_is_served_when_the_upstream_fails():
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (0, 0)}, persist=False)
+        first = await cache.get_or_fetch("api", "key", _fetch_value({"v": 1}))
+        second = await cache.get_or_fetch("api", "key", _failing_fetch())
+        return first, second, cache
+
+    first, second, cache = asyncio.run(scenario())
+    assert first == second == {"v": 1}
+    assert cache.expired_hits == 1
+
+
+def test_upstream_error_is_raised_without_a_cached_entry():
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (0, 0)}, persist=False)
+        await cache.get_or_fetch("api", "key", _failing_fetch())
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(scenario())
+
+
+def test_stale_entry_survives_a_failed_background_refresh():
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (0, 3600)}, persist=False)
+        await cache.get_or_fetch("api", "key", _fetch_value("old"))
+        stale = await cache.get_or_fetch("api", "key", _failing_fetch())
+        await asyncio.sleep(0)  # let the background refresh fail
+        again = await cache.get_or_fetch("api", "key", _fetch_value("new"))
+        await asyncio.sleep(0)
+        refreshed = cache.peek("api", "key")
+        return stale, again, refreshed, cache
+
+    stale, again, refreshed, cache = asyncio.run(scenario())
+    assert stale == again == "old"
+    assert refreshed == "new"
+    assert cache.stale_hits == 2
+
+
+def test_expired_entries_are_served_for_a_failed_batch():
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (0, 0)}, persist=False)
+
+        async def fetch_many(keys):
+            return [f"value {key}" for key in keys]
+
+        async def fail_many(keys):
+            raise httpx.ReadTimeout("slow")
+
+        await cache.get_many_or_fetch("api", ["a"], fetch_many)
+        return await cache.get_many_or_fetch("api", ["a", "b"], fail_many)
+
+    assert asyncio.run(scenario()) == ["value a", None]
+
+
+def test_rejected_responses_are_not_cached():
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (3600, 0)}, persist=False)
+        await cache.get_or_fetch("api", "key", _fetch_value(None), cacheable=bool)
+        return cache.peek("api", "key"), cache.misses
+
+    assert asyncio.run(scenario()) == (None, 1)
+
+
+def test_concurrent_first_lookups_load_from_disk_once(monkeypatch):
+    loads = []
+
+    async def fetch_cached_responses(now, _limit):
+        loads.append(now)
+        await asyncio.sleep(0.01)
+        return [("api:key", '"from disk"', now + 3600, now + 3600)]
+
+    monkeypatch.setattr(response_cache, "fetch_cached_responses", fetch_cached_responses)
+
+    async def scenario():
+        cache = ResponseCache(ttls={"api": (3600, 0)}, persist=True)
+        return await asyncio.gather(*(cache.get_or_fetch("api", "key", _failing_fetch()) for _ in range(3)))
+
+    assert asyncio.run(scenario()) == ["from disk"] * 3
+    assert len(loads) == 1
@@ -0,0 +1,59 @@
+"""
+Tests for full-text search over the stored messages.
+"""
+import asyncio
+import pytest
+import message_store
+from message_store import BUCKET_SECONDS, FTS_TABLE
+
+HOUR = 480000  # an arbitrary bucket number
+BASE = HOUR * BUCKET_SECONDS
+
+pytestmark = pytest.mark.skipif(not message_store.FTS_ENABLED, reason="SQLite built without FTS5")
+
+
+def test_search_forgets_purged_messages(conn, insert_messages):
+    insert_messages([
+        (1, 10, 1, "the purple elephant", BASE + 1),
+        (2, 10, 1, "another purple idea", BASE + BUCKET_SECONDS + 1),
+    ])
+    assert {hit[0] for hit in message_store.search_rows(conn, 10, "purple", 10)} == {1, 2}
+
+    message_store.drop_expired_buckets(conn, BASE + BUCKET_SECONDS)
+
+    assert [hit[0] for hit in message_store.search_rows(conn, 10, "purple", 10)] == [2]
+    assert message_store.search_rows(conn, 10, "elephant", 10) == []
+    assert conn.execute(f"SELECT rowid FROM {FTS_TABLE}").fetchall() == [(2,)]
+
+
+def test_scores_are_comparable_across_buckets(conn, insert_messages):
+    # "purple" is rare in the first hour and in every message of the second. Scored per
+    # bucket, the first hour's copy would outrank the identical later ones.
+    insert_messages([(1, 10, 1, "purple rain", BASE + 1)])
+    insert_messages([(n, 10, 1, f"filler message {n}", BASE + n) for n in range(2, 10)])
+    insert_messages([(n, 10, 1, "purple rain", BASE + BUCKET_SECONDS + n) for n in range(10, 14)])
+
+    hits = message_store.search_rows(conn, 10, "purple", 10)
+    assert [hit[0] for hit in hits] == [13, 12, 11, 10, 1]  # equal scores, newest first
+    assert [hit[0] for hit in message_store.search_rows(conn, 10, "purple", 2, offset=3)] == [10, 1]
+
+
+def test_search_only_returns_the_chats_own_messages(conn, insert_messages):
+    insert_messages([(1, 10, 1, "shared word", BASE + 1), (2, 20, 1, "shared word", BASE + 2)])
+    hits = message_store.search_rows(conn, 20, "shared", 10)
+    assert [(hit[0], hit[1], hit[2]) for hit in hits] == [(2, 1, BASE + 2)]
+    assert hits[0][3] == f"{message_store.SNIPPET_START}shared{message_store.SNIPPET_END} word"
+
+
+def test_search_sees_messages_still_queued():
+    async def scenario():
+        message_id = message_store.store_message(88, 1, "freshly typed zeppelin", BASE + 1)
+        return message_id, await message_store.search(88, "zeppelin", 5)
+
+    message_id, hits = asyncio.run(scenario())
+    assert [hit[0] for hit in hits] == [message_id]
+
+
+def test_build_match_query_quotes_user_input():
+    assert message_store.build_match_query('say "hi" foo*') == '"say" AND """hi""" AND "foo"*'
+    assert message_store.build_match_query("***") == ""
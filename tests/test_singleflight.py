@@ -0,0 +1,98 @@
+"""
+Tests for the single-flight coalescing of upstream calls.
+"""
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_share_one_fetch():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(*(flights.do("api", "key", fetch) for _ in range(5)))
+        return results, calls, flights.stats()
+
+    results, calls, stats = run(scenario())
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert stats == {"api": (5, 4)}
+
+
+def test_exception_is_shared_with_waiters():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        return await asyncio.gather(*(flights.do("api", "key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_leader_hands_the_call_to_a_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return calls
+
+        leader = asyncio.create_task(flights.do("api", "key", fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(flights.do("api", "key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters), calls
+
+    results, calls = run(scenario())
+    assert results == [2, 2]  # both waiters got the retried call, neither was cancelled
+    assert calls == 2
+
+
+class Interrupted(BaseException):
+    """Stands in for KeyboardInterrupt or SystemExit, which asyncio would re-raise out of the loop."""
+
+
+def test_interrupted_leader_releases_the_key():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise Interrupted()
+            return calls
+
+        leader = asyncio.create_task(flights.do("api", "key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("api", "key", fetch))
+        with pytest.raises(Interrupted):
+            await leader
+        return await asyncio.wait_for(waiter, 1), flights._in_flight  # pylint: disable=protected-access
+
+    result, in_flight = run(scenario())
+    assert result == 2
+    assert not in_flight
@@ -0,0 +1,34 @@
+"""
+Tests for composing long summary windows from hourly partials.
+"""
+from message_store import BUCKET_SECONDS, read_ranges
+from summarizer import build_segments, uncovered_ranges
+
+HOUR = 480000  # an arbitrary bucket number
+BASE = HOUR * BUCKET_SECONDS
+
+
+def test_uncovered_ranges_skip_partial_hours():
+    partials = {HOUR + 1: "first", HOUR + 2: "", HOUR + 4: "third", HOUR - 1: "before the window"}
+    assert uncovered_ranges(BASE + 600, partials) == [
+        (BASE + 600, BASE + BUCKET_SECONDS),
+        (BASE + 3 * BUCKET_SECONDS, BASE + 4 * BUCKET_SECONDS),
+        (BASE + 5 * BUCKET_SECONDS, None),
+    ]
+    assert uncovered_ranges(BASE, {}) == [(BASE, None)]
+
+
+def test_window_reads_only_the_messages_no_partial_covers(conn, insert_messages):
+    insert_messages([
+        (1, 10, 1, "partial start", BASE + 900),
+        (2, 10, 1, "summarized", BASE + BUCKET_SECONDS + 5),
+        (3, 20, 1, "other chat", BASE + BUCKET_SECONDS + 6),
+        (4, 10, 1, "quiet hour", BASE + 2 * BUCKET_SECONDS + 5),
+        (5, 10, 1, "current", BASE + 3 * BUCKET_SECONDS + 5),
+    ])
+    partials = {HOUR + 1: "hour one", HOUR + 2: ""}
+    rows = read_ranges(conn, 10, uncovered_ranges(BASE + 600, partials))
+    messages = [(row[3], row[2]) for row in rows]
+
+    assert [text for _timestamp, text in messages] == ["partial start", "current"]
+    assert build_segments(BASE + 600, partials, messages) == [["partial start"], "hour one", ["current"]]
@@ -0,0 +1,60 @@
+"""
+Tests for the summary cache.
+"""
+import asyncio
+from summary_cache import SummaryCache
+
+
+def test_concurrent_requests_share_one_summary():
+    async def scenario():
+        cache = SummaryCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "summary"
+
+        results = await asyncio.gather(*(cache.get_or_compute((1, "1h", 7), compute) for _ in range(3)))
+        again = await cache.get_or_compute((1, "1h", 7), compute)
+        return results, again, calls, cache
+
+    results, again, calls, cache = asyncio.run(scenario())
+    assert results == ["summary"] * 3
+    assert again == "summary"
+    assert calls == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 2, 1)
+
+
+def test_rejected_results_are_not_stored():
+    async def scenario():
+        cache = SummaryCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return "Error: Summary generation timed out."
+
+        def cacheable(text):
+            return not text.startswith("Error")
+
+        for _ in range(2):
+            await cache.get_or_compute((1, "1h", 7), compute, cacheable)
+        return calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_expired_entries_are_recomputed():
+    async def scenario():
+        cache = SummaryCache(ttl=0)
+        values = iter(["first", "second"])
+
+        async def compute():
+            return next(values)
+
+        return [await cache.get_or_compute("key", compute) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["first", "second"]
@@ -0,0 +1,78 @@
+"""
+Tests for the summarization worker pool front end.
+"""
+import ast
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import os
+import subprocess
+import sys
+import pytest
+import summary_worker
+from summary_worker import SummaryService
+
+
+class BrokenExecutor:
+    """Executor whose task fails with BrokenProcessPool after another call replaced the pool."""
+
+    def __init__(self, service, replacement):
+        self.service = service
+        self.replacement = replacement
+        self.stopped = False
+
+    def submit(self, _func, *_args):
+        self.service._executor = self.replacement  # pylint: disable=protected-access
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):  # pylint: disable=unused-argument
+        self.stopped = True
+
+
+def test_broken_pool_only_stops_the_pool_it_ran_on():
+    service = SummaryService(workers=1)
+    healthy = BrokenExecutor(service, None)
+    broken = BrokenExecutor(service, healthy)
+    service._executor = broken  # pylint: disable=protected-access
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(service.run(len, [1]))
+
+    assert broken.stopped
+    assert not healthy.stopped
+    assert service._executor is healthy  # pylint: disable=protected-access
+
+
+def test_worker_module_imports_no_database_or_bot_code():
+    code = (
+        "import sys; import summary_model; "
+        "print(sorted(name for name in ('db', 'message_store', 'summarizer', 'telegram') if name in sys.modules))"
+    )
+    src = next(path for path in sys.path if path.endswith("src"))
+    output = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_worker_spawned_by_the_bot_loads_no_bot_code(tmp_path):
+    # Spawned workers re-run the parent's main script as __mp_main__; run one under a parent whose main is bot.py
+    src = os.path.dirname(os.path.abspath(summary_worker.__file__))
+    code = (
+        "import __main__, asyncio, os; "
+        f"__main__.__file__ = os.path.join({src!r}, 'bot.py'); "
+        "from summary_worker import SummaryService; "
+        "service = SummaryService(workers=1); "
+        "print(asyncio.run(service.run(eval, 'sorted(__import__(\"sys\").modules)'))); "
+        "service.close()"
+    )
+    env = {
+        **os.environ, "MESSAGES_DB": str(tmp_path / "messages.db"), "TELEGRAM_BOT_TOKEN": "",
+        "SUMMARIZER_MODEL": str(tmp_path / "no-model"), "HF_HUB_OFFLINE": "1",
+    }
+    output = subprocess.run([sys.executable, "-c", code], cwd=src, env=env, capture_output=True, text=True,
+                            check=True, timeout=120)
+    modules = ast.literal_eval(output.stdout.strip().splitlines()[-1])
+    assert "__mp_main__" in modules
+    assert not {"db", "message_store", "telegram", "httpx"} & set(modules)
+    assert not (tmp_path / "messages.db").exists()
@@ -0,0 +1,59 @@
+"""
+Tests for the local title index behind inline movie queries.
+"""
+import asyncio
+import pytest
+from title_index import TitleIndex, normalize_title, word_keys
+
+TITLES = [
+    {"imdbID": "tt15239678", "Title": "Dune: Part Two", "Year": "2024", "Type": "movie"},
+    {"imdbID": "tt1160419", "Title": "Dune", "Year": "2021", "Type": "movie"},
+    {"imdbID": "tt0087182", "Title": "Dune", "Year": "1984", "Type": "movie"},
+    {"imdbID": "tt0120338", "Title": "Titanic", "Year": "1997", "Type": "movie"},
+    {"imdbID": "tt0903747", "Title": "Breaking Bad", "Year": "2008–2013", "Type": "series"},
+    {"imdbID": "tt2267998", "Title": "Amélie", "Year": "2001", "Type": "movie"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    titles = TitleIndex()
+    asyncio.run(titles.add(TITLES))
+    return titles
+
+
+def _ids(results):
+    return [result[0] for result in results]
+
+
+def test_word_keys_pad_word_starts():
+    assert word_keys("dune") == {" du", "dun", "une"}
+    assert word_keys("d") == {"d"}
+    assert normalize_title("Amélie: The Movie!") == "amelie the movie"
+
+
+def test_whole_query_prefix_ranks_first_and_shorter_first(index):
+    results = index.search("dune")
+    assert set(_ids(results)) == {"tt1160419", "tt0087182", "tt15239678"}
+    assert results[-1][0] == "tt15239678"  # the longer title comes after the two "Dune"s
+
+
+def test_partial_last_word_matches_word_starts(index):
+    assert _ids(index.search("dune pa")) == ["tt15239678"]
+    assert _ids(index.search("bad")) == ["tt0903747"]  # a later word of the title
+    assert _ids(index.search("tit")) == ["tt0120338"]
+    assert _ids(index.search("b")) == ["tt0903747"]  # one letter goes through the first-letter postings
+
+
+def test_shared_trigrams_inside_words_do_not_match(index):
+    assert index.search("une") == []  # "une" is a trigram of "dune", but no word starts with it
+    assert index.search("art") == []  # "art" is in "Part" but starts no word
+    assert index.search("reaking") == []
+
+
+def test_accents_and_case_are_ignored(index):
+    assert _ids(index.search("AMELIE")) == ["tt2267998"]
+
+
+def test_limit(index):
+    assert len(index.search("d", limit=2)) == 2
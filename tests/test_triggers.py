@@ -0,0 +1,150 @@
+"""
+Tests for the trigger automaton and the per-chat trigger registry.
+"""
+import asyncio
+import random
+from types import SimpleNamespace
+import triggers
+from triggers import DISABLED, KINDS, TriggerAutomaton, TriggerRegistry, trigger_command
+
+DEFAULTS = {
+    "informer": ("gif", "informer.gif"),
+    "not worthwhile": ("sticker", "sticker-id"),
+    "cunts": ("emoji", "🍑"),
+}
+
+
+def brute_force_match(triggers, text):
+    """Best-priority trigger in text; among equals the one ending first, then the longest there."""
+    best, best_rank = None, None
+    for phrase, (kind, response) in triggers.items():
+        start = text.find(phrase)
+        if kind not in KINDS or not phrase or start < 0:
+            continue
+        rank = (KINDS.index(kind), start + len(phrase), -len(phrase))
+        if best_rank is None or rank < best_rank:
+            best, best_rank = (kind, response), rank
+    return best
+
+
+def test_automaton_agrees_with_brute_force():
+    rng = random.Random(14)
+    for _ in range(300):
+        triggers = {
+            "".join(rng.choice("abc") for _ in range(rng.randint(1, 4))): (rng.choice(KINDS), str(n))
+            for n in range(rng.randint(1, 8))
+        }
+        automaton = TriggerAutomaton(triggers)
+        for _ in range(20):
+            text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+            assert automaton.match(text) == brute_force_match(triggers, text), (triggers, text)
+
+
+def test_automaton_prefers_priority_over_position():
+    automaton = TriggerAutomaton(DEFAULTS)
+    assert automaton.match("cunts, the informer") == ("gif", "informer.gif")
+    assert automaton.match("this is not worthwhile, cunts") == ("sticker", "sticker-id")
+    assert automaton.match("nothing to see") is None
+    assert TriggerAutomaton({}).match("informer") is None
+
+
+def test_chat_trigger_overrides_default():
+    registry = TriggerRegistry(DEFAULTS)
+
+    async def scenario():
+        await registry.add(1401, "informer", "emoji", "🐀")
+        return await registry.match(1401, "the informer"), await registry.match(1402, "the informer")
+
+    assert asyncio.run(scenario()) == (("emoji", "🐀"), ("gif", "informer.gif"))
+
+
+def test_remove_disables_default_only_in_that_chat():
+    registry = TriggerRegistry(DEFAULTS)
+
+    async def scenario():
+        removed = await registry.remove(1403, "cunts")
+        removed_again = await registry.remove(1403, "cunts")
+        return removed, removed_again, await registry.match(1403, "cunts"), await registry.match(1404, "cunts")
+
+    assert asyncio.run(scenario()) == (True, False, None, ("emoji", "🍑"))
+    # The switched-off default survives a restart
+    assert "cunts" not in asyncio.run(TriggerRegistry(DEFAULTS).effective(1403))
+
+
+def test_add_and_remove_rebuild_only_that_chats_automaton():
+    registry = TriggerRegistry(DEFAULTS)
+
+    async def scenario():
+        before = await registry._automaton(1405)  # pylint: disable=protected-access
+        other = await registry._automaton(1406)  # pylint: disable=protected-access
+        await registry.add(1405, "banana", "emoji", "🍌")
+        added = await registry.match(1405, "a banana")
+        await registry.remove(1405, "banana")
+        return before, other, added, await registry.match(1405, "a banana"), await registry.match(1406, "a banana")
+
+    before, other, added, after_remove, other_chat = asyncio.run(scenario())
+    assert before is other  # unconfigured chats share the default automaton
+    assert added == ("emoji", "🍌")
+    assert after_remove is None and other_chat is None
+    assert registry._automata[1406] is other  # pylint: disable=protected-access
+
+
+def _command(chat_id, args, status, chat_type="supergroup"):
+    """Fake /trigger update and context from a member with the given status; returns them and the replies."""
+    replies = []
+
+    async def reply_text(text):
+        replies.append(text)
+
+    async def get_chat_member(_chat_id, _user_id):
+        return SimpleNamespace(status=status)
+
+    message = SimpleNamespace(
+        chat_id=chat_id, chat=SimpleNamespace(id=chat_id, type=chat_type), from_user=SimpleNamespace(id=7),
+        reply_to_message=None, reply_text=reply_text,
+    )
+    context = SimpleNamespace(args=args, bot=SimpleNamespace(get_chat_member=get_chat_member))
+    return SimpleNamespace(message=message), context, replies
+
+
+def test_only_admins_change_group_triggers(monkeypatch):
+    registry = TriggerRegistry(DEFAULTS)
+    monkeypatch.setattr(triggers, "trigger_registry", registry)
+
+    async def run(args, status, chat_type="supergroup"):
+        update, context, replies = _command(1407, args, status, chat_type)
+        await trigger_command(update, context)
+        return replies[0]
+
+    async def scenario():
+        return [
+            await run(["add", "emoji", "🦆", "quack"], "member"),
+            await run(["remove", "cunts"], "member"),
+            await run(["list"], "member"),
+            await run(["add", "emoji", "🦆", "quack"], "administrator"),
+            await run(["add", "emoji", "🦢", "honk"], "member", chat_type="private"),
+        ]
+
+    added, removed, listed, admin_added, private_added = asyncio.run(scenario())
+    assert added == removed == "❌ Only chat admins can change triggers."
+    assert "cunts" in listed and "quack" not in listed
+    assert admin_added.startswith("✅") and private_added.startswith("✅")
+
+
+def test_switched_off_defaults_do_not_count_towards_the_limit(monkeypatch):
+    registry = TriggerRegistry(DEFAULTS)
+    monkeypatch.setattr(triggers, "trigger_registry", registry)
+    monkeypatch.setattr(triggers, "MAX_TRIGGERS_PER_CHAT", 1)
+
+    async def scenario():
+        await registry.remove(1408, "cunts")
+        update, context, replies = _command(1408, ["add", "emoji", "🦆", "quack"], "creator")
+        await trigger_command(update, context)
+        update, context, replies_again = _command(1408, ["add", "emoji", "🦢", "honk"], "creator")
+        await trigger_command(update, context)
+        return replies + replies_again, await registry.triggers(1408)
+
+    replies, configured = asyncio.run(scenario())
+    assert replies[0].startswith("✅")
+    assert replies[1] == "❌ This chat already has 1 triggers."
+    assert configured == {"cunts": (DISABLED, ""), "quack": ("emoji", "🦆")}
@@ -0,0 +1,45 @@
+"""
+Tests for the Saltney weather station poller.
+"""
+import asyncio
+import sqlite3
+import httpx
+import http_client
+import weather_station
+from weather_station import StationPoller, parse_readings
+
+PAGE = """
+<html><head><style>td { color: red }</style><script>var label = "Outside Temperature";</script></head>
+<body><table>
+<tr><td>Outside Temperature</td><td>12.3°C</td></tr>
+<tr><td>Outside Humidity:</td><td>81%</td></tr>
+<tr><td>Barometer</td><td>1013.2 mbar</td></tr>
+</table></body></html>
+"""
+
+
+def test_parse_readings_skips_scripts_and_keeps_field_order():
+    assert parse_readings(PAGE) == {
+        "Outside Temperature": "12.3°C", "Outside Humidity": "81%", "Barometer": "1013.2 mbar",
+    }
+
+
+def test_live_reading_is_reported_when_sqlite_fails(monkeypatch):
+    async def broken_db(*_args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(weather_station, "fetch_station_readings", broken_db)
+    monkeypatch.setattr(weather_station, "save_station_reading", broken_db)
+
+    async def scenario():
+        http_client._client = httpx.AsyncClient(  # pylint: disable=protected-access
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text=PAGE))
+        )
+        try:
+            return await StationPoller("http://station.example/").report()
+        finally:
+            await http_client.close_http_client()
+
+    report = asyncio.run(scenario())
+    assert report.startswith("Current Outside Temperature in Saltney: 12.3°C")
+    assert "Outside Humidity: 81%" in report